@@ -1,5 +1,7 @@
 import streamlit as st
 import re
+import uuid
+from candidate_store import save_interview
 
 def is_valid_email(email):
     return "@" in email and "." in email
@@ -21,6 +23,8 @@ if "step" not in st.session_state:
     st.session_state.step = -1
 if "answers" not in st.session_state:
     st.session_state.answers = {}
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 st.title("JobSage - Conversational Hiring Assistant")
 
@@ -52,6 +56,9 @@ elif st.session_state.step < len(questions):
         if question["validate"](user_input):
             st.session_state.answers[question["key"]] = user_input.strip()
             st.session_state.step += 1
+            # Queued for the background store, so saving never blocks the turn
+            status = "completed" if st.session_state.step == len(questions) else "partial"
+            save_interview(st.session_state.session_id, "chatbot1", status, st.session_state.answers)
             st.rerun()
         else:
             st.warning(question["error"])
@@ -1,19 +1,37 @@
 import streamlit as st
-from transformers import pipeline
 import re
+import os
+import uuid
+from candidate_store import save_interview
+from model_registry import get_pipeline
+from batching_server import run_pipeline
+from warmup import warm_up
+from metrics import begin_turn, end_turn, start_metrics_server
+from streaming import timed_stream, pipeline_text_stream
+from question_cache import question_cache, question_cache_key
+from question_prompts import chatbot2_question_prompt
+from question_bank import question_bank, ANY
 
 # -------------------- Hugging Face Pipeline Setup --------------------
-generator = pipeline(
-    "text2text-generation",
-    model="google/flan-t5-small"
-)
+# The pipeline is loaded lazily on first use and shared across sessions
+def get_generator():
+    return get_pipeline("text2text-generation", "google/flan-t5-small")
+
+# Set JOBSAGE_STREAM=1 to render the generated question token by token
+STREAM_OUTPUT = os.environ.get("JOBSAGE_STREAM") == "1"
 
 # Function to generate one skill-related question
 def generate_skill_question(desired_position, skills):
-    prompt = f"Ask one interview question for a {desired_position} role focusing on these skills: {skills}."
-    output = generator(prompt, max_length=150)[0]['generated_text']
+    prompt = chatbot2_question_prompt(desired_position, skills)
+    # Batched with concurrent sessions through the shared inference server
+    output = run_pipeline("text2text-generation", "google/flan-t5-small", prompt, max_length=150)[0]['generated_text']
     return output.strip()
 
+# Same as generate_skill_question, but yields text as tokens are generated
+def stream_skill_question(desired_position, skills):
+    prompt = chatbot2_question_prompt(desired_position, skills)
+    return timed_stream(pipeline_text_stream(get_generator(), prompt, skip_prompt=True, max_length=150))
+
 # -------------------- Validation Helpers --------------------
 def is_valid_name(name):
     parts = name.strip().split()
@@ -40,6 +58,7 @@ if "step" not in st.session_state:
     st.session_state.tech_questions = []
     st.session_state.tech_question_index = 0
     st.session_state.tech_answers = []
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Define the interview questions (personal details)
 questions = [
@@ -55,6 +74,35 @@ questions = [
     "Enter your skills (comma-separated)."
 ]
 
+# Queue a snapshot of the interview for the background store; never blocks the turn
+def persist_interview(status):
+    answers = dict(zip(questions, st.session_state.answers))
+    answered = len(st.session_state.tech_answers)
+    save_interview(
+        st.session_state.session_id, "chatbot2", status, answers,
+        st.session_state.tech_questions[:answered], st.session_state.tech_answers,
+    )
+
+# Name of the interview stage, used for metrics and turn traces
+def current_stage():
+    if st.session_state.step < len(questions):
+        return "personal"
+    if not st.session_state.tech_questions_asked:
+        return "generation"
+    if st.session_state.tech_question_index < len(st.session_state.tech_questions):
+        return "tech"
+    return "summary"
+
+# Close the current turn's trace before rerunning the script
+def rerun():
+    end_turn(current_stage())
+    st.rerun()
+
+start_metrics_server()
+# Preload heavy imports and models in the background when JOBSAGE_WARMUP=1
+warm_up("chatbot2")
+begin_turn(current_stage(), st.session_state.session_id)
+
 # -------------------- General Q&A --------------------
 if st.session_state.step < len(questions):
     question = questions[st.session_state.step]
@@ -83,7 +131,8 @@ if st.session_state.step < len(questions):
         if valid:
             st.session_state.answers.append(user_input)
             st.session_state.step += 1
-            st.rerun()
+            persist_interview("partial")
+            rerun()
 
 # -------------------- Skill-based Question --------------------
 elif not st.session_state.tech_questions_asked:
@@ -92,12 +141,22 @@ elif not st.session_state.tech_questions_asked:
     with st.chat_message("assistant", avatar="⚛️"):
         st.markdown("Generating a skill-related technical question based on your desired position and skills...")
 
-    # Generate **one** question
-    qlist = [generate_skill_question(desired_position, skills)]
+    # Generate **one** question, or take it from the pre-generated question bank, or
+    # draw it from the shared cache when other candidates with the same position,
+    # skills and experience filled its pool
+    cache_key = question_cache_key(desired_position, skills, st.session_state.answers[6], namespace="chatbot2")
+    qlist = question_bank.draw("chatbot2", desired_position, skills, ANY, 1) or question_cache.draw(cache_key, 1)
+    if not qlist:
+        if STREAM_OUTPUT:
+            with st.chat_message("assistant", avatar="⚛️"):
+                qlist = [st.write_stream(stream_skill_question(desired_position, skills)).strip()]
+        else:
+            qlist = [generate_skill_question(desired_position, skills)]
+        question_cache.add(cache_key, qlist)
     st.session_state.tech_questions = qlist
     st.session_state.tech_questions_asked = True
     st.session_state.tech_question_index = 0
-    st.rerun()
+    rerun()
 
 elif st.session_state.tech_question_index < len(st.session_state.tech_questions):
     # Show previous Q&A (if any)
@@ -118,7 +177,9 @@ elif st.session_state.tech_question_index < len(st.session_state.tech_questions)
             st.markdown(user_input)
         st.session_state.tech_answers.append(user_input)
         st.session_state.tech_question_index += 1
-        st.rerun()
+        done = st.session_state.tech_question_index == len(st.session_state.tech_questions)
+        persist_interview("completed" if done else "partial")
+        rerun()
 
 # -------------------- End of Interview --------------------
 else:
@@ -134,3 +195,6 @@ else:
         st.markdown(f"👉 {st.session_state.tech_answers[idx]}")
 
     st.info("Our team will review your responses and get back to you soon!")
+
+# Record the turn when the script finishes without a rerun
+end_turn(current_stage())
@@ -1,16 +1,46 @@
 # Import required libraries
 import streamlit as st
-from openai import OpenAI
 import re
-
-# Read the Hugging Face OpenAI API key from a local file and set up the client
-with open("mykey.txt") as f:
-    HF_API_KEY = f.read().strip()
-client = OpenAI(
-    base_url="https://router.huggingface.co/v1",
-    api_key=HF_API_KEY,
+import os
+from candidate_store import save_interview
+from llm_client import chat, LLMError
+from rate_scheduler import INTERACTIVE, GENERATION, PREFETCH
+from warmup import warm_up
+from metrics import inc, track, record_tokens, begin_turn, end_turn, in_turn, start_metrics_server
+from moderation import check_message, check_message_background
+from question_cache import question_cache, question_cache_key, difficulty_bucket
+from question_prompts import jobsage_question_prompt
+from question_bank import question_bank
+from question_dedupe import QuestionDeduper
+from session_store import get_session_store
+from interview_session import InterviewSession, STAGE_NAMES, GREETING, PERSONAL, CONFIRM, CORRECTION, TECH, SUMMARY, ENDED
+from transcript import render_transcript, render_details
+from streaming import timed_stream, openai_text_stream
+from question_fanout import (
+    executor, generation_flight, submit_questions, collect_question, cancel_all,
+    build_batch_prompt, parse_question_list, local_questions,
 )
 
+# The OpenAI client is shared by all sessions and created once per process in llm_client
+# (API key from HF_API_KEY or mykey.txt, endpoint from JOBSAGE_BASE_URL).
+
+# Technical question generation settings.
+# "concurrent" sends all requests at once and shows Q1 as soon as it arrives,
+# "batch" asks for all questions in one JSON request, "stream" generates each question
+# when it is asked and renders its tokens as they arrive, "sequential" is the old loop.
+QUESTION_MODE = os.environ.get("JOBSAGE_QUESTION_MODE", "concurrent")
+NUM_TECH_QUESTIONS = 5
+QUESTION_TIMEOUT = float(os.environ.get("JOBSAGE_QUESTION_TIMEOUT", "30"))
+# Start generating technical questions in the background while the candidate is
+# still confirming their details (concurrent and batch modes only)
+SPECULATIVE_PREFETCH = os.environ.get("JOBSAGE_PREFETCH", "1") == "1"
+# Moderation sits on every turn, so it gets a short deadline and may be hedged
+MODERATION_DEADLINE = float(os.environ.get("JOBSAGE_MODERATION_TIMEOUT", "10"))
+# "optimistic" accepts an answer while its LLM moderation check runs in the background
+# and enforces a late "impolite" verdict at the next turn; "blocking" waits for it
+MODERATION_MODE = os.environ.get("JOBSAGE_MODERATION_MODE", "optimistic")
+POLITENESS_WARNING = "🛑 Please be polite during this conversation. Let's continue."
+
 # Validation functions to check user inputs for correctness
 
 def is_valid_name(name):
@@ -34,6 +64,10 @@ def is_yes_no(value):
     # Checks if the input is exactly 'yes' or 'no' (case-insensitive)
     return value.lower() in ["yes", "no"]
 
+def is_valid_years(value):
+    # Checks for a whole number of years
+    return value.isdigit()
+
 def is_valid_score(value):
     # Checks if the value can be converted to a float or is "NA" (not applicable)
     try:
@@ -50,10 +84,19 @@ def is_message_polite(message):
         "Please answer 'yes' or 'no' only.\n\n"
         f"Message: \"{message}\""
     )
-    completion = client.chat.completions.create(
-        model="openai/gpt-oss-120b:cerebras",
-        messages=[{"role": "user", "content": prompt}],
-    )
+    try:
+        with track("llm_call", purpose="moderation"):
+            completion = chat(
+                [{"role": "user", "content": prompt}],
+                deadline=MODERATION_DEADLINE,
+                hedge=True,
+                purpose="moderation",
+                priority=INTERACTIVE,
+            )
+    except LLMError:
+        # No verdict: check_message fails open for this turn without caching it
+        return None
+    record_tokens(completion.usage, purpose="moderation")
     answer = completion.choices[0].message.content.strip().lower()
     return answer == "no"
 
@@ -76,42 +119,6 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Exit button resets the entire session state to initial values to restart interaction
-if st.button("Exit", key="exit_button"):
-    st.session_state.started = False
-    st.session_state.step = 0
-    st.session_state.answers = {}
-    st.session_state.tech_questions = []
-    st.session_state.tech_answers = []
-    st.session_state.tech_index = 0
-    st.session_state.confirm_stage = False
-    st.session_state.correction_stage = False
-    st.session_state.swear_count = 0
-    st.session_state.ended_due_to_inappropriate_language = False
-    st.rerun()
-
-# Initialize session state variables if they don't exist yet
-if "started" not in st.session_state:
-    st.session_state.started = False
-if "step" not in st.session_state:
-    st.session_state.step = 0
-if "answers" not in st.session_state:
-    st.session_state.answers = {}
-if "tech_questions" not in st.session_state:
-    st.session_state.tech_questions = []
-if "tech_answers" not in st.session_state:
-    st.session_state.tech_answers = []
-if "tech_index" not in st.session_state:
-    st.session_state.tech_index = 0
-if "confirm_stage" not in st.session_state:
-    st.session_state.confirm_stage = False
-if "correction_stage" not in st.session_state:
-    st.session_state.correction_stage = False
-if "swear_count" not in st.session_state:
-    st.session_state.swear_count = 0
-if "ended_due_to_inappropriate_language" not in st.session_state:
-    st.session_state.ended_due_to_inappropriate_language = False
-
 # List of personal questions with associated validation functions
 personal_questions = [
     ("Full Name (First and Last name)", is_valid_name),
@@ -122,186 +129,508 @@ personal_questions = [
     ("Graduated? (yes/no)", is_yes_no),
     ("Score/Percentage (only if graduated, else type NA)", is_valid_score),
     ("Current Position (optional, type NA if none)", lambda x: True),
-    ("Total Experience in years", lambda x: x.isdigit()),
+    ("Total Experience in years", is_valid_years),
     ("Desired Position", lambda x: True),
     ("Skills (comma-separated)", lambda x: True)
 ]
 
+# Lookup tables over the personal questions, built once per process.
+# Answers are stored by integer field id (the question's position in the list).
+QUESTION_LABELS = tuple(label for label, _ in personal_questions)
+FIELD_VALIDATORS = tuple(validator for _, validator in personal_questions)
+FIELD_IDS = {label: field_id for field_id, label in enumerate(QUESTION_LABELS)}
+NUM_FIELDS = len(personal_questions)
+EXPERIENCE = FIELD_IDS["Total Experience in years"]
+POSITION = FIELD_IDS["Desired Position"]
+SKILLS = FIELD_IDS["Skills (comma-separated)"]
+
+# In-progress interviews live in the process-wide session store under a token kept
+# in the URL (?session=...), so a candidate whose connection drops, or who comes back
+# later with the same link, resumes where they stopped. Idle sessions are spilled to
+# disk (see session_store.py).
+session_store = get_session_store(InterviewSession.from_bytes)
+
+def new_session():
+    session = InterviewSession(NUM_FIELDS)
+    session_store.put(session.session_id, session)
+    st.query_params["session"] = session.session_id
+    return session
+
+# Start a new interview. The old one stays in the session store and can be resumed with its link.
+def reset_session():
+    cancel_all(interview.tech_futures)
+    interview.tech_futures = []
+    st.session_state.previous_session = interview.session_id
+    new_session()
+
+# The session for this page's token, rehydrated if it was spilled, or a new one
+def load_session():
+    token = st.query_params.get("session")
+    session = session_store.get(token) if token else None
+    return session if session is not None else new_session()
+
+# All interview state lives in one compact record (see interview_session.py)
+interview = load_session()
+if "previous_session" in st.session_state:
+    st.info(f"Your previous interview was saved. Open this page with ?session={st.session_state.pop('previous_session')} to resume it.")
+
+# Exit button starts a new interview to restart interaction
+if st.button("Exit", key="exit_button"):
+    reset_session()
+    st.rerun()
+
+# Prompt used for technical question generation; question difficulty depends on experience.
+# Shared with the offline question bank (see question_prompts.py).
+def skill_question_prompt(position, skills, experience):
+    return jobsage_question_prompt(position, skills, difficulty_bucket(experience))
+
 # Function using OpenAI model to generate a concise technical interview question
-def generate_skill_question(position, skills, experience):
-    # Determine question difficulty based on experience
-    difficulty = "moderate" if int(experience) < 2 else "advanced"
-    prompt = f"Ask one concise {difficulty} technical interview question for a {position} role with these skills: {skills}. Keep it short (max 2 sentences)."
-    completion = client.chat.completions.create(
-        model="openai/gpt-oss-120b:cerebras",
-        messages=[{"role": "user", "content": prompt}],
-    )
+def generate_skill_question(position, skills, experience, timeout=None, priority=GENERATION):
+    prompt = skill_question_prompt(position, skills, experience)
+    with track("llm_call", purpose="generation"):
+        completion = chat(
+            [{"role": "user", "content": prompt}],
+            deadline=timeout or QUESTION_TIMEOUT,
+            purpose="generation",
+            priority=priority,
+        )
+    record_tokens(completion.usage, purpose="generation")
     return completion.choices[0].message.content.strip()
 
-# Function to process user inputs and check politeness, managing swear word counts and blocking if needed
-def process_user_input(user_input):
-    polite = is_message_polite(user_input)
+# Function streaming one technical question as text chunks, timing first token and total latency
+def stream_skill_question(position, skills, experience):
+    prompt = skill_question_prompt(position, skills, experience)
+    with track("llm_call", purpose="generation_stream"):
+        stream = chat(
+            [{"role": "user", "content": prompt}],
+            deadline=QUESTION_TIMEOUT,
+            purpose="generation_stream",
+            stream=True,
+        )
+    return timed_stream(openai_text_stream(stream))
+
+# Function generating all technical questions in a single request returning a JSON array
+def generate_skill_questions(position, skills, experience, n, timeout=None, priority=GENERATION):
+    prompt = build_batch_prompt(skill_question_prompt(position, skills, experience), n)
+    with track("llm_call", purpose="generation_batch"):
+        completion = chat(
+            [{"role": "user", "content": prompt}],
+            deadline=timeout or QUESTION_TIMEOUT,
+            purpose="generation_batch",
+            priority=priority,
+        )
+    record_tokens(completion.usage, purpose="generation_batch")
+    # Drop near-duplicates within the reply, then top up with single requests
+    # if the model returned fewer distinct questions than asked
+    deduper = QuestionDeduper()
+    for q in parse_question_list(completion.choices[0].message.content, n):
+        if not deduper.is_duplicate(q):
+            deduper.add(q)
+    regenerate = lambda: generate_skill_question(position, skills, experience, timeout, priority)
+    while len(deduper) < n:
+        deduper.unique(regenerate(), regenerate)
+    return deduper.questions
+
+# Personal answers that technical question generation depends on
+def tech_question_params():
+    return (
+        interview.answers[POSITION],
+        interview.answers[SKILLS],
+        interview.answers[EXPERIENCE],
+    )
+
+# Start technical question generation according to QUESTION_MODE.
+# Candidates applying for the same role with the same skills are served a
+# random draw from the shared question cache once its pool is full.
+def start_tech_questions(position, skills, experience, priority=GENERATION):
+    interview.tech_params = (position, skills, experience)
+    cache_key = question_cache_key(position, skills, experience)
+    # Pre-generated questions first (see question_bank.py), then the runtime cache
+    cached = (question_bank.draw("jobsage", position, skills, difficulty_bucket(experience), NUM_TECH_QUESTIONS)
+              or question_cache.draw(cache_key, NUM_TECH_QUESTIONS))
+    if cached:
+        interview.tech_questions = cached
+    elif QUESTION_MODE in ("batch", "concurrent"):
+        submit_tech_questions(position, skills, experience, priority)
+    elif QUESTION_MODE == "sequential":
+        try:
+            deduper = QuestionDeduper()
+            regenerate = lambda: generate_skill_question(position, skills, experience)
+            for slot in range(NUM_TECH_QUESTIONS):
+                q = deduper.unique(generation_flight.do((cache_key, slot), regenerate), regenerate)
+                interview.tech_questions.append(q)
+            question_cache.add(cache_key, interview.tech_questions)
+        except LLMError:
+            fill_with_fallback_questions(position, skills, experience)
+    # In stream mode each question is streamed when it is asked, see the tech stage below
+
+# Start background generation of the questions not generated yet; collected in get_tech_question.
+# Candidates with the same normalized role, skills and difficulty share in-flight calls:
+# question slot i of every such candidate is one upstream request.
+def submit_tech_questions(position, skills, experience, priority=GENERATION):
+    cache_key = question_cache_key(position, skills, experience)
+    if QUESTION_MODE == "batch":
+        # A single background request; followers get their own copy of the list
+        generate = lambda: generate_skill_questions(position, skills, experience, NUM_TECH_QUESTIONS, QUESTION_TIMEOUT, priority)
+        interview.tech_futures = [executor.submit(lambda: list(generation_flight.do((cache_key, "batch"), generate)))]
+    else:
+        # Questions are added to the cache one by one as they are collected
+        generate = lambda: generate_skill_question(position, skills, experience, QUESTION_TIMEOUT, priority)
+        slots = range(len(interview.tech_questions), NUM_TECH_QUESTIONS)
+        interview.tech_futures = submit_questions(generate, [(cache_key, slot) for slot in slots])
+
+# Drop generated or in-flight technical questions, e.g. when their inputs changed
+def reset_tech_questions():
+    cancel_all(interview.tech_futures)
+    interview.tech_futures = []
+    interview.tech_questions = []
+    interview.tech_params = None
+
+# Speculatively start generation once position, skills and experience are known.
+# If one of them is corrected later, the stale work is cancelled and restarted.
+def prefetch_tech_questions():
+    if not SPECULATIVE_PREFETCH or QUESTION_MODE not in ("concurrent", "batch"):
+        return
+    params = tech_question_params()
+    if interview.tech_params != params:
+        reset_tech_questions()
+        # Speculative work yields to moderation and to candidates already waiting for questions
+        start_tech_questions(*params, priority=PREFETCH)
+
+# When the model is unreachable (errors, deadline or open circuit breaker), complete
+# the remaining questions from the role's cached pool, the question bank, then local templates.
+# Fallback questions are not added to the question cache.
+def fill_with_fallback_questions(position, skills, experience):
+    cancel_all(interview.tech_futures)
+    questions = interview.tech_questions
+    missing = NUM_TECH_QUESTIONS - len(questions)
+    inc("question_fallback_total", missing, help="technical questions served without the model")
+    candidates = question_cache.sample(question_cache_key(position, skills, experience), NUM_TECH_QUESTIONS)
+    candidates += question_bank.sample("jobsage", position, skills, difficulty_bucket(experience), NUM_TECH_QUESTIONS)
+    candidates += local_questions(position, skills, NUM_TECH_QUESTIONS)
+    for q in candidates:
+        if len(questions) == NUM_TECH_QUESTIONS:
+            break
+        if q not in questions:
+            questions.append(q)
+
+# Return the technical question at index, waiting only for that one if it is still in flight
+def get_tech_question(index, position, skills, experience):
+    cache_key = question_cache_key(position, skills, experience)
+    if len(interview.tech_questions) <= index:
+        # Time spent waiting on background generation shows up in the turn trace
+        with track("question_wait", mode=QUESTION_MODE):
+            try:
+                collect_tech_questions(index, position, skills, experience, cache_key)
+            except LLMError:
+                fill_with_fallback_questions(position, skills, experience)
+    return interview.tech_questions[index]
+
+# Collect finished background generations until the question at index is available
+def collect_tech_questions(index, position, skills, experience, cache_key):
+    if not interview.tech_futures:
+        # A session rehydrated from the session store comes back without its in-flight generations
+        submit_tech_questions(position, skills, experience)
+    while len(interview.tech_questions) <= index:
+        if QUESTION_MODE == "batch":
+            questions = collect_question(
+                interview.tech_futures.pop(0),
+                QUESTION_TIMEOUT,
+                lambda: generate_skill_questions(position, skills, experience, NUM_TECH_QUESTIONS, QUESTION_TIMEOUT),
+            )
+            interview.tech_questions = questions
+            question_cache.add(cache_key, questions)
+        else:
+            future = interview.tech_futures.pop(0)
+            regenerate = lambda: generate_skill_question(position, skills, experience, QUESTION_TIMEOUT)
+            q = collect_question(future, QUESTION_TIMEOUT, regenerate)
+            # Regenerate (a bounded number of times) if it nearly repeats an earlier question
+            q = QuestionDeduper(interview.tech_questions).unique(q, regenerate)
+            interview.tech_questions.append(q)
+            question_cache.add(cache_key, [q])
+
+# Queue a snapshot of the interview for the background store; never blocks the turn.
+# status is "partial", "completed" or "ended".
+def persist_interview(status):
+    answered = len(interview.tech_answers)
+    save_interview(
+        interview.session_id,
+        "jobsage",
+        status,
+        interview.answers_by_label(QUESTION_LABELS),
+        interview.tech_questions[:answered],
+        interview.tech_answers,
+    )
+
+# Validators whose accepted values are structured (names, numbers, emails, ...),
+# so a message passing one of them only needs the local lexicon check
+STRUCTURAL_VALIDATORS = {
+    is_valid_name, is_valid_phone, is_valid_email, is_valid_alpha,
+    is_yes_no, is_valid_score, is_valid_years,
+}
+
+# Function to process user inputs and check politeness, managing swear word counts and blocking if needed.
+# The local moderation tier decides clear cases; the LLM is only asked about ambiguous free text.
+# background=False checks the message before returning even in optimistic mode, for
+# answers after which the interview is saved as completed.
+def process_user_input(user_input, validator=None, background=True):
+    # Earlier answers still being moderated are settled before this one is accepted
+    if not apply_moderation_verdicts(wait=True):
+        return False
+    validated = validator in STRUCTURAL_VALIDATORS and validator(user_input)
+    if MODERATION_MODE == "optimistic" and background:
+        polite = check_message_background(user_input, is_message_polite, validated)
+        if not isinstance(polite, bool):
+            # The LLM is needed: accept the answer now, enforce the verdict later
+            interview.pending_moderation.append(polite)
+            return True
+    else:
+        polite = check_message(user_input, is_message_polite, validated)
     if not polite:
-        st.session_state.swear_count += 1
-        if st.session_state.swear_count == 1:
+        interview.swear_count += 1
+        if interview.swear_count == 1:
             # First warning for impoliteness
             with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-                st.markdown("🛑 Please be polite during this conversation. Let's continue.")
+                st.markdown(POLITENESS_WARNING)
             return False
         else:
             # If repeated impoliteness, end interaction
-            st.session_state.ended_due_to_inappropriate_language = True
+            interview.stage = ENDED
+            persist_interview("ended")
             return False
     return True
 
+# Enforce background moderation verdicts of earlier answers. A late "impolite" counts
+# like one caught up front: a warning the first time (shown on the next render, as
+# the answer has already moved the interview on), then the interview ends.
+# Returns False once the interview has ended.
+def apply_moderation_verdicts(wait=False):
+    pending = []
+    for future in interview.pending_moderation:
+        if not wait and not future.done():
+            pending.append(future)
+            continue
+        try:
+            polite = future.result()
+        except Exception:
+            # Fail open, as is_message_polite does when the model is unavailable
+            polite = True
+        inc("moderation_late_verdicts_total", help="background moderation verdicts enforced after the turn",
+            verdict="polite" if polite else "impolite")
+        if not polite and interview.stage != ENDED:
+            interview.swear_count += 1
+            if interview.swear_count == 1:
+                st.session_state.politeness_warning = True
+            else:
+                interview.stage = ENDED
+                persist_interview("ended")
+    interview.pending_moderation = pending
+    return interview.stage != ENDED
+
+# Finished turns for the transcripts, derived from the stored answers. Each turn
+# is formatted once per browser session and cached (see transcript.py).
+def render_personal_turns():
+    render_transcript("personal", interview.session_id, interview.step,
+                      lambda i: (f"**{QUESTION_LABELS[i]}:**", interview.answers[i]))
+
+def render_tech_turns():
+    render_transcript("tech", interview.session_id, interview.tech_index,
+                      lambda i: (f"**Q{i+1}:** {interview.tech_questions[i]}", interview.tech_answers[i]))
+
+# Name of the interview stage the session is in, used for metrics and turn traces
+def current_stage():
+    return STAGE_NAMES[interview.stage]
+
+# Close the current turn's trace before rerunning the script
+def rerun():
+    end_turn(current_stage())
+    st.rerun()
+
+# Metrics endpoint, started once per process when JOBSAGE_METRICS_PORT is set
+start_metrics_server()
+# Preload heavy imports and models in the background when JOBSAGE_WARMUP=1
+warm_up("jobsage")
+# Verdicts that arrived since the last turn take effect before anything is rendered
+apply_moderation_verdicts()
+if st.session_state.pop("politeness_warning", False):
+    st.toast(POLITENESS_WARNING)
+begin_turn(current_stage(), interview.session_id)
+
 # Main conversational flow starts here
+# Finished turns are replayed as chat messages on every full rerun. The live turn
+# (the current question and the answer to it) runs as a fragment, so an answer
+# rejected with a warning reruns only that block; accepted answers go through
+# rerun() and rerun the whole app.
 
-# If the conversation has not started, show intro and ask user to type "hi" to begin
-if not st.session_state.started:
-    with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-        st.markdown("Hi I am **JobSage**, a hiring assistant chatbot for TalentScout. I'll be taking your initial screen processing today. Type **hi** to continue.")
-    user_input = st.chat_input("Type hi to continue...")
-    if user_input is not None:
-        if process_user_input(user_input):  # Check for politeness
-            if user_input.strip().lower() == "hi":
-                st.session_state.started = True
-                st.rerun()
+# Personal questions stage: show previously given answers for context
+if interview.stage == PERSONAL:
+    render_personal_turns()
+
+# Technical questions stage: generate 5 relevant skill-based interview questions
+elif interview.stage == TECH:
+    position, skills, experience = tech_question_params()
+    # Generate technical questions only once, unless the prefetched ones are stale
+    if interview.tech_params != (position, skills, experience):
+        reset_tech_questions()
+        start_tech_questions(position, skills, experience)
+    if not interview.tech_questions and QUESTION_MODE != "stream":
+        with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
+            st.markdown("Generating technical questions... ⏳")
+
+    # Display previous technical Q&As
+    render_tech_turns()
+
+# The live turn as a fragment, see the top of the main flow
+@st.fragment
+def live_turn():
+    # A fragment rerun does not rerun the script, and the sweeper may have spilled the
+    # session since the last full run: look it up again so answers reach the stored copy
+    global interview
+    interview = load_session()
+    if in_turn():
+        current_turn()
+    else:
+        # A fragment rerun (the script did not run, so no turn was started) is a turn of its own
+        begin_turn(current_stage(), interview.session_id)
+        current_turn()
+        end_turn(current_stage())
+
+# The current question and the handling of the answer, for every stage but the summary
+def current_turn():
+    # If the conversation has not started, show intro and ask user to type "hi" to begin
+    if interview.stage == GREETING:
+        with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
+            st.markdown("Hi I am **JobSage**, a hiring assistant chatbot for TalentScout. I'll be taking your initial screen processing today. Type **hi** to continue.")
+        user_input = st.chat_input("Type hi to continue...")
+        if user_input is not None:
+            if process_user_input(user_input):  # Check for politeness
+                if user_input.strip().lower() == "hi":
+                    interview.stage = PERSONAL
+                    rerun()
 
-else:
     # If multiple swear uses, block further interaction
-    if st.session_state.ended_due_to_inappropriate_language:
+    elif interview.stage == ENDED:
         with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
             st.error("🚫 You have used inappropriate language multiple times. We will not move ahead. Goodbye!")
 
-    else:
-        # Correction stage: allow the user to correct previously entered data
-        if st.session_state.correction_stage:
-            with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-                st.markdown("Current details (copy the exact field name to correct):")
-                for q, a in st.session_state.answers.items():
-                    st.markdown(f"**{q}:**")
-                    st.markdown(f"😊 {a}")
-                st.markdown(
-                    "Please enter the correction in this format: \n"
-                    "`Field Name: new value`\n\n"
-                    "For example: `Phone Number (10 digits): 9876543210`"
-                )
-            user_input = st.chat_input("Type correction (e.g., Phone Number (10 digits): 9876543210)...")
-            if user_input is not None:
-                if not process_user_input(user_input):
-                    st.rerun()
-                if ":" not in user_input:
-                    st.warning("Please use the format: Field Name: new value")
-                else:
-                    field_candidate, new_value = user_input.split(":", 1)
-                    field_candidate = field_candidate.strip()
-                    new_value = new_value.strip()
-                    valid_fields = [q for q, _ in personal_questions]
-                    if field_candidate not in valid_fields:
-                        st.warning("Invalid field name. Please copy and paste the field name exactly. Try again.")
-                    else:
-                        validator = dict(personal_questions)[field_candidate]
-                        # Validate the corrected input value
-                        if not validator(new_value):
-                            st.warning("Invalid value for this field. Please check the format and try again.")
-                        else:
-                            st.session_state.answers[field_candidate] = new_value
-                            st.session_state.correction_stage = False
-                            st.session_state.confirm_stage = True
-                            st.rerun()
-
-        # Confirmation stage: ask user to confirm all entered details are correct
-        elif st.session_state.confirm_stage:
-            with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-                st.markdown("Here are the details you entered. Are all of these correct? Type **yes** to confirm, or **no** to make a correction.")
-                for q, a in st.session_state.answers.items():
-                    st.markdown(f"**{q}:**")
-                    st.markdown(f"😊 {a}")
-            user_input = st.chat_input("Are all details correct? (yes/no)")
-            if user_input is not None:
-                if not process_user_input(user_input):
-                    st.rerun()
-                if user_input.strip().lower() == "yes":
-                    st.session_state.confirm_stage = False
-                    st.rerun()
-                elif user_input.strip().lower() == "no":
-                    st.session_state.correction_stage = True
-                    st.rerun()
+    # Correction stage: allow the user to correct previously entered data
+    elif interview.stage == CORRECTION:
+        with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
+            st.markdown("Current details (copy the exact field name to correct):")
+            render_details(QUESTION_LABELS, interview.answers)
+            st.markdown(
+                "Please enter the correction in this format: \n"
+                "`Field Name: new value`\n\n"
+                "For example: `Phone Number (10 digits): 9876543210`"
+            )
+        user_input = st.chat_input("Type correction (e.g., Phone Number (10 digits): 9876543210)...")
+        if user_input is not None:
+            if not process_user_input(user_input):
+                rerun()
+            if ":" not in user_input:
+                st.warning("Please use the format: Field Name: new value")
+            else:
+                field_candidate, new_value = user_input.split(":", 1)
+                field_id = FIELD_IDS.get(field_candidate.strip())
+                new_value = new_value.strip()
+                if field_id is None:
+                    st.warning("Invalid field name. Please copy and paste the field name exactly. Try again.")
+                # Validate the corrected input value
+                elif not FIELD_VALIDATORS[field_id](new_value):
+                    st.warning("Invalid value for this field. Please check the format and try again.")
                 else:
-                    st.warning("Please type **yes** or **no**.")
+                    interview.answers[field_id] = new_value
+                    persist_interview("partial")
+                    prefetch_tech_questions()
+                    interview.stage = CONFIRM
+                    rerun()
 
-        # Personal questions stage: ask the user each question, validate and store answers
-        elif st.session_state.step < len(personal_questions):
-            question, validator = personal_questions[st.session_state.step]
+    # Confirmation stage: ask user to confirm all entered details are correct
+    elif interview.stage == CONFIRM:
+        with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
+            st.markdown("Here are the details you entered. Are all of these correct? Type **yes** to confirm, or **no** to make a correction.")
+            render_details(QUESTION_LABELS, interview.answers)
+        user_input = st.chat_input("Are all details correct? (yes/no)")
+        if user_input is not None:
+            if not process_user_input(user_input, is_yes_no):
+                rerun()
+            if user_input.strip().lower() == "yes":
+                interview.stage = TECH
+                rerun()
+            elif user_input.strip().lower() == "no":
+                interview.stage = CORRECTION
+                rerun()
+            else:
+                st.warning("Please type **yes** or **no**.")
+
+    # Personal questions stage: ask the user each question, validate and store answers
+    elif interview.stage == PERSONAL:
+        question, validator = personal_questions[interview.step]
+
+        # Ask current question to the user
+        with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
+            st.markdown(question)
+        user_input = st.chat_input("Your answer...")
+        if user_input is not None:
+            if not process_user_input(user_input, validator):
+                rerun()
+            elif not validator(user_input):
+                st.warning("Invalid input, please try again.")
+            else:
+                # Store the valid answer and move to next question
+                interview.answers[interview.step] = user_input
+                persist_interview("partial")
+                interview.step += 1
+                if interview.step == NUM_FIELDS:
+                    interview.stage = CONFIRM
+                    prefetch_tech_questions()
+                rerun()
 
-            # Show previously given answers for context
-            for q, a in st.session_state.answers.items():
-                with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-                    st.markdown(f"**{q}:**")
-                with st.chat_message("user", avatar="😊"):
-                    st.markdown(a)
+    # Technical questions stage: ask the current skill-based question and store the answer
+    elif interview.stage == TECH:
+        position, skills, experience = tech_question_params()
 
-            # Ask current question to the user
+        # Ask the current technical question
+        if QUESTION_MODE == "stream" and len(interview.tech_questions) <= interview.tech_index:
+            # Render the question token by token in its chat bubble
             with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-                st.markdown(question)
-            user_input = st.chat_input("Your answer...")
-            if user_input is not None:
-                if not process_user_input(user_input):
-                    st.rerun()
-                elif not validator(user_input):
-                    st.warning("Invalid input, please try again.")
-                else:
-                    # Store the valid answer and move to next question
-                    st.session_state.answers[question] = user_input
-                    st.session_state.step += 1
-                    if st.session_state.step == len(personal_questions):
-                        st.session_state.confirm_stage = True
-                    st.rerun()
-
-        # Technical questions stage: generate and ask 5 relevant skill-based interview questions
-        elif st.session_state.tech_index < 5:
-            # Generate technical questions only once
-            if not st.session_state.tech_questions:
-                experience = st.session_state.answers["Total Experience in years"]
-                position = st.session_state.answers["Desired Position"]
-                skills = st.session_state.answers["Skills (comma-separated)"]
-                with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-                    st.markdown("Generating technical questions... ⏳")
-                for _ in range(5):
-                    q = generate_skill_question(position, skills, experience)
-                    st.session_state.tech_questions.append(q)
-
-            # Display previous technical Q&As
-            for i in range(st.session_state.tech_index):
-                with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
-                    st.markdown(f"**Q{i+1}:** {st.session_state.tech_questions[i]}")
-                with st.chat_message("user", avatar="😊"):
-                    st.markdown(st.session_state.tech_answers[i])
-
-            # Ask the current technical question
-            curr_q = st.session_state.tech_questions[st.session_state.tech_index]
+                try:
+                    curr_q = st.write_stream(stream_skill_question(position, skills, experience)).strip()
+                    interview.tech_questions.append(curr_q)
+                    question_cache.add(question_cache_key(position, skills, experience), [curr_q])
+                except LLMError:
+                    fill_with_fallback_questions(position, skills, experience)
+                    curr_q = interview.tech_questions[interview.tech_index]
+                    st.markdown(curr_q)
+        else:
+            curr_q = get_tech_question(interview.tech_index, position, skills, experience)
             with st.chat_message("assistant", avatar="🧙🏻‍♂️"):
                 st.markdown(curr_q + " ⏳")
-            user_input = st.chat_input("Your answer...")
-            if user_input is not None:
-                if not process_user_input(user_input):
-                    st.rerun()
-                # Store the user's technical answer and move to next
-                st.session_state.tech_answers.append(user_input)
-                st.session_state.tech_index += 1
-                st.rerun()
-
-        # When all questions answered, show completion message with collected data summary
-        else:
-            st.success("✅ You have completed the interview! 🎉")
-            st.subheader("📝 Your Personal Details")
-            for q, a in st.session_state.answers.items():
-                st.markdown(f"**{q}:**")
-                st.markdown(f"😊 {a}")
-
-            st.subheader("⚡ Skill-based Questions and Your Answers")
-            for i, q in enumerate(st.session_state.tech_questions):
-                st.markdown(f"**Q{i+1}: {q}**")
-                st.markdown(f"😊 {st.session_state.tech_answers[i]}")
-
-            st.info("Our team will review your responses and get back to you soon!")
+        user_input = st.chat_input("Your answer...")
+        if user_input is not None:
+            # The last answer completes the interview, so its verdict cannot arrive late
+            last_answer = interview.tech_index == NUM_TECH_QUESTIONS - 1
+            if not process_user_input(user_input, background=not last_answer):
+                rerun()
+            # Store the user's technical answer and move to next
+            interview.tech_answers.append(user_input)
+            if interview.tech_index == NUM_TECH_QUESTIONS:
+                interview.stage = SUMMARY
+            persist_interview("completed" if interview.stage == SUMMARY else "partial")
+            rerun()
+
+# When all questions answered, show completion message with collected data summary
+if interview.stage == SUMMARY:
+    st.success("✅ You have completed the interview! 🎉")
+    st.subheader("📝 Your Personal Details")
+    render_details(QUESTION_LABELS, interview.answers)
+
+    st.subheader("⚡ Skill-based Questions and Your Answers")
+    render_tech_turns()
+
+    st.info("Our team will review your responses and get back to you soon!")
+else:
+    live_turn()
+
+# Record the turn when the script finishes without a rerun
+end_turn(current_stage())
@@ -0,0 +1,159 @@
+# In-process inference server that micro-batches prompts across sessions.
+# Sessions that reach the skill stage at the same time submit their prompts to a
+# shared queue; a worker thread waits up to a short window for more requests and
+# runs them through the pipeline as one padded batch instead of several
+# batch-size-1 forward passes.
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+from metrics import register_collector, safe_name, track
+from model_registry import get_pipeline
+
+BATCHING_ENABLED = os.environ.get("JOBSAGE_BATCHING", "1") == "1"
+MAX_BATCH_SIZE = int(os.environ.get("JOBSAGE_MAX_BATCH_SIZE", "8"))
+MAX_WAIT_MS = float(os.environ.get("JOBSAGE_BATCH_WAIT_MS", "20"))
+MAX_QUEUE = int(os.environ.get("JOBSAGE_BATCH_QUEUE", "256"))
+
+
+class _Request:
+    def __init__(self, prompt, kwargs):
+        self.prompt = prompt
+        self.kwargs = kwargs
+        self.group = tuple(sorted(kwargs.items()))
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class BatchingInferenceServer:
+    def __init__(self, load_pipe, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE):
+        # load_pipe() returns the pipeline; fetched per batch so the model
+        # registry can still evict idle models
+        self.load_pipe = load_pipe
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._latencies = deque(maxlen=1000)
+        self._requests = 0
+        self._worker = threading.Thread(target=self._run, name="batching-server", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt, timeout=None, **kwargs):
+        # Queue a prompt and return a Future resolving to the pipeline output for it.
+        # Raises queue.Full when the queue stays full for timeout seconds (backpressure).
+        request = _Request(prompt, kwargs)
+        self._queue.put(request, timeout=timeout)
+        return request.future
+
+    def generate(self, prompt, timeout=None, **kwargs):
+        # Blocking call with the same return shape as pipe(prompt, **kwargs)
+        return self.submit(prompt, timeout=timeout, **kwargs).result(timeout)
+
+    def _collect(self):
+        # Block for the first request, then gather more until the batch is full
+        # or the wait window measured from the first request has passed
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Requests with different generation settings cannot share a forward pass
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.group, []).append(request)
+            for requests in groups.values():
+                self._run_group(requests)
+
+    def _run_group(self, requests):
+        prompts = [r.prompt for r in requests]
+        try:
+            outputs = self.load_pipe()(prompts, batch_size=len(prompts), **requests[0].kwargs)
+        except Exception as exc:
+            for r in requests:
+                r.future.set_exception(exc)
+            return
+        done = time.perf_counter()
+        with self._lock:
+            self._batch_sizes[len(requests)] += 1
+            self._requests += len(requests)
+            for r in requests:
+                self._latencies.append(done - r.enqueued)
+        for r, output in zip(requests, outputs):
+            # text2text pipelines return one dict per prompt, text-generation a list
+            r.future.set_result(output if isinstance(output, list) else [output])
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            batches = sum(self._batch_sizes.values())
+            return {
+                "requests": self._requests,
+                "batches": batches,
+                "mean_batch_size": round(self._requests / batches, 2) if batches else 0,
+                "batch_size_counts": dict(self._batch_sizes),
+                "queue_depth": self._queue.qsize(),
+                "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else None,
+            }
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def _batchable_pipeline(task, model):
+    pipe = get_pipeline(task, model)
+    tokenizer = pipe.tokenizer
+    if tokenizer.pad_token_id is None:
+        # gpt2 has no pad token; pad with EOS on the left so generation continues the prompt
+        tokenizer.pad_token_id = pipe.model.config.eos_token_id
+        tokenizer.padding_side = "left"
+    return pipe
+
+
+def get_batching_server(task, model):
+    # One server per (task, model), sharing the pipeline from the model registry
+    key = f"{task}:{model}"
+    with _servers_lock:
+        server = _servers.get(key)
+        if server is None:
+            server = _servers[key] = BatchingInferenceServer(lambda: _batchable_pipeline(task, model))
+        return server
+
+
+def _collect():
+    values = {}
+    for key, server in list(_servers.items()):
+        label = safe_name(key)
+        stats = server.stats()
+        values[f"batch_queue_depth_{label}"] = stats["queue_depth"]
+        values[f"batch_mean_size_{label}"] = stats["mean_batch_size"]
+        values[f"batch_requests_{label}"] = stats["requests"]
+    return values
+
+
+register_collector("batching", _collect)
+
+
+def run_pipeline(task, model, prompt, **kwargs):
+    # Generate through the shared batching server, or call the pipeline directly
+    # when batching is disabled (JOBSAGE_BATCHING=0)
+    with track("model_call", model=model, batched=BATCHING_ENABLED):
+        if BATCHING_ENABLED:
+            return get_batching_server(task, model).generate(prompt, **kwargs)
+        return get_pipeline(task, model)(prompt, **kwargs)
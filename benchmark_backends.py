@@ -0,0 +1,76 @@
+# Benchmark the local inference backends against the default PyTorch pipeline.
+# Each backend is loaded in a fresh process so load time and resident memory are
+# measured in isolation, then its outputs are checked against the fp32 reference.
+#
+#   python benchmark_backends.py --backends pytorch int8 onnx --runs 5
+import argparse
+import multiprocessing
+import statistics
+import time
+
+from inference_backends import BACKENDS, CHECK_PROMPTS, check_outputs, greedy_kwargs, load_pipeline
+from model_registry import current_rss_bytes
+
+MODELS = [
+    ("text2text-generation", "google/flan-t5-small"),
+    ("text-generation", "gpt2"),
+]
+
+
+def measure(task, model, backend, runs, check):
+    # Runs in a child process
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    pipe = load_pipeline(task, model, backend)
+    load_seconds = time.perf_counter() - start
+    memory = current_rss_bytes() - rss_before
+
+    latencies = []
+    kwargs = greedy_kwargs(task)
+    for _ in range(runs):
+        for prompt in CHECK_PROMPTS:
+            start = time.perf_counter()
+            pipe(prompt, **kwargs)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    result = {
+        "task": task,
+        "model": model,
+        "backend": backend,
+        "load_s": round(load_seconds, 2),
+        "memory_mb": round(memory / 2**20, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+    }
+    if check and backend != "pytorch":
+        report = check_outputs(task, load_pipeline(task, model, "pytorch"), pipe)
+        result["check"] = "ok" if report["passed"] else "FAILED"
+        result["overlap"] = report["mean_overlap"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local inference backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--runs", type=int, default=3, help="passes over the prompt set per backend")
+    parser.add_argument("--no-check", action="store_true", help="skip the output correctness check")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for task, model in MODELS:
+        for backend in args.backends:
+            with ctx.Pool(1) as pool:
+                try:
+                    rows.append(pool.apply(measure, (task, model, backend, args.runs, not args.no_check)))
+                except Exception as exc:
+                    rows.append({"task": task, "model": model, "backend": backend, "error": repr(exc)})
+
+    columns = ["model", "backend", "load_s", "memory_mb", "p50_ms", "p95_ms", "check", "overlap", "error"]
+    print("\t".join(columns))
+    for row in rows:
+        print("\t".join(str(row.get(c, "")) for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Bulk screening of candidate spreadsheets.
+# Applies the same validation rules as the chat apps (JobSage.py personal
+# questions, Chatbot1_0.py questions) to whole columns at once with pandas string
+# operations and precompiled regexes, and streams a per-row error report to CSV
+# chunk by chunk, so 100k-row files are screened in seconds.
+#
+#   python bulk_import.py candidates.csv --report errors.csv
+#   python bulk_import.py candidates.xlsx --rules chatbot1 --report errors.csv --store
+#
+# Columns are matched case-insensitively on the field key (e.g. "phone") or the
+# question label used in the app (e.g. "Phone Number (10 digits)").
+import argparse
+import re
+import sys
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+NAME_RE = re.compile(r"^[^\W\d_]+(?:\s+[^\W\d_]+)+$")
+EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+TWO_WORDS_RE = re.compile(r"\S\s+\S")
+# Everything float() accepts: decimals with optional underscores and exponent, inf and nan
+_DIGITS = r"\d+(?:_\d+)*"
+FLOAT_RE = re.compile(
+    rf"^\s*[+-]?(?:(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?|inf|infinity|nan)\s*$",
+    re.IGNORECASE,
+)
+
+
+# -------------------- Vectorized rules --------------------
+# Each takes a Series of stripped strings and returns a boolean Series of valid cells.
+# Keep them in step with the scalar validators named in the comments. The Series
+# must have object dtype: pandas' Arrow-backed str dtype runs regexes with ASCII-only
+# \w and \d, so "José Álvarez" would fail valid_name while is_valid_name accepts it.
+
+def valid_name(s):
+    # JobSage is_valid_name: at least two parts, all alphabetic
+    return s.str.match(NAME_RE)
+
+
+def valid_phone(s):
+    # JobSage is_valid_phone: exactly 10 digits
+    return s.str.isdigit() & s.str.len().eq(10)
+
+
+def valid_email(s):
+    # JobSage is_valid_email
+    return s.str.match(EMAIL_RE)
+
+
+def valid_alpha(s):
+    # JobSage is_valid_alpha
+    return s.str.isalpha()
+
+
+def yes_no(s):
+    # JobSage is_yes_no
+    return s.str.lower().isin(["yes", "no"])
+
+
+def valid_years(s):
+    # JobSage is_valid_years; Chatbot1 "Years of Experience"
+    return s.str.isdigit()
+
+
+def valid_score(s):
+    # JobSage is_valid_score: a number or NA
+    return s.str.match(FLOAT_RE) | s.str.upper().eq("NA")
+
+
+def any_value(s):
+    return pd.Series(True, index=s.index)
+
+
+def two_words(s):
+    # Chatbot1 "Full Name": at least first and last name
+    return s.str.contains(TWO_WORDS_RE)
+
+
+def loose_email(s):
+    # Chatbot1 is_valid_email
+    return s.str.contains("@", regex=False) & s.str.contains(".", regex=False)
+
+
+def phone_10_13(s):
+    # Chatbot1 is_valid_phone: 10 to 13 digits
+    return s.str.isdigit() & s.str.len().between(10, 13)
+
+
+def non_empty(s):
+    return s.ne("")
+
+
+# (key, label in the app, rule, error message)
+RULE_SETS = {
+    "jobsage": [
+        ("name", "Full Name (First and Last name)", valid_name, "Enter first and last name using letters only."),
+        ("phone", "Phone Number (10 digits)", valid_phone, "Phone number must be exactly 10 digits."),
+        ("email", "Email Address", valid_email, "Not a valid email address."),
+        ("location", "Location (city/state)", valid_alpha, "Location must contain letters only."),
+        ("education", "Highest Education", valid_alpha, "Education must contain letters only."),
+        ("graduated", "Graduated? (yes/no)", yes_no, "Answer yes or no."),
+        ("score", "Score/Percentage (only if graduated, else type NA)", valid_score, "Score must be a number or NA."),
+        ("current_position", "Current Position (optional, type NA if none)", any_value, ""),
+        ("experience", "Total Experience in years", valid_years, "Experience must be a whole number of years."),
+        ("position", "Desired Position", any_value, ""),
+        ("skills", "Skills (comma-separated)", any_value, ""),
+    ],
+    "chatbot1": [
+        ("full_name", "Full Name", two_words, "Please enter your full name (first and last)."),
+        ("email", "Email Address", loose_email, "Please enter a valid email address."),
+        ("phone", "Phone Number", phone_10_13, "Please enter a valid phone number (10-13 digits)."),
+        ("experience", "Years of Experience", valid_years, "Please enter number of years as a non-negative integer."),
+        ("position", "Desired Position", non_empty, "Please specify the desired position."),
+        ("location", "Current Location", non_empty, "Please enter your current location."),
+        ("tech_stack", "Tech Stack (skills, tools, languages)", non_empty, "Please describe your main tech stack."),
+    ],
+}
+
+REPORT_COLUMNS = ["row", "field", "value", "error"]
+
+
+def match_columns(columns, rules):
+    # Map each rule key to the spreadsheet column holding it (or None if absent)
+    lookup = {str(c).strip().lower(): c for c in columns}
+    return {
+        key: lookup.get(key) if key in lookup else lookup.get(label.lower())
+        for key, label, _, _ in rules
+    }
+
+
+def validate_frame(df, rules, columns, first_row=1):
+    # Returns (error report DataFrame, boolean array of valid rows) for one chunk.
+    # Rows are numbered from 1 in file order, header excluded.
+    rows = np.arange(first_row, first_row + len(df))
+    valid_rows = np.ones(len(df), dtype=bool)
+    reports = []
+    for key, label, rule, message in rules:
+        column = columns[key]
+        if column is None:
+            values = pd.Series("", index=df.index, dtype=object)
+        else:
+            values = df[column].astype(object).str.strip()
+        ok = rule(values).to_numpy(dtype=bool)
+        bad = np.flatnonzero(~ok)
+        if len(bad):
+            valid_rows[bad] = False
+            reports.append(pd.DataFrame({
+                "row": rows[bad],
+                "field": key,
+                "value": values.to_numpy()[bad],
+                "error": message if column is not None else f"Missing column for {label}.",
+            }))
+    report = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=REPORT_COLUMNS)
+    return report.sort_values("row", kind="stable"), valid_rows
+
+
+def read_chunks(path, chunksize):
+    # All cells as Python strings (object dtype, see the rules above); "NA" stays a
+    # literal answer instead of becoming NaN
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path, dtype=str, keep_default_na=False).astype(object)  # needs openpyxl
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(path, dtype=object, keep_default_na=False, chunksize=chunksize)
+
+
+def screen_file(path, rule_set="jobsage", chunksize=50000):
+    # Yields (chunk, error report, valid-row mask) per chunk of the file
+    rules = RULE_SETS[rule_set]
+    first_row = 1
+    columns = None
+    for chunk in read_chunks(path, chunksize):
+        if columns is None:
+            columns = match_columns(chunk.columns, rules)
+        report, valid = validate_frame(chunk, rules, columns, first_row)
+        yield chunk, report, valid
+        first_row += len(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a CSV/Excel file of candidates with the chat apps' validation rules")
+    parser.add_argument("path", help="candidates file (.csv, .xlsx or .xls)")
+    parser.add_argument("--rules", choices=sorted(RULE_SETS), default="jobsage")
+    parser.add_argument("--report", help="write the per-row error report to this CSV (default: stdout)")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--store", action="store_true", help="save valid rows to the candidate store as imported interviews")
+    args = parser.parse_args()
+
+    rules = RULE_SETS[args.rules]
+    out = open(args.report, "w", newline="", encoding="utf-8") if args.report else sys.stdout
+    start = time.perf_counter()
+    total = invalid = errors = stored = 0
+    header = True
+    for chunk, report, valid in screen_file(args.path, args.rules, args.chunksize):
+        report.to_csv(out, header=header, index=False)
+        out.flush()
+        header = False
+        total += len(chunk)
+        invalid += int((~valid).sum())
+        errors += len(report)
+        if args.store and valid.any():
+            from candidate_store import import_interviews
+
+            columns = match_columns(chunk.columns, rules)
+            present = [(label, columns[key]) for key, label, _, _ in rules if columns[key] is not None]
+            answers = pd.DataFrame({label: chunk[column].str.strip() for label, column in present})[valid]
+            stored += import_interviews(
+                ((uuid.uuid4().hex, record) for record in answers.to_dict("records")), app=args.rules,
+            )
+    elapsed = time.perf_counter() - start
+    if out is not sys.stdout:
+        out.close()
+    print(
+        f"Screened {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s): "
+        f"{total - invalid} valid, {invalid} invalid, {errors} errors"
+        + (f", {stored} stored" if args.store else ""),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# Durable storage for finished and in-progress interviews.
+# Interviews are kept in a local SQLite database in WAL mode. The chat apps never
+# write to it directly: save_interview() only puts a record on a queue, and a
+# background writer thread group-commits everything queued in one transaction,
+# so a chat turn never waits on disk.
+#
+# Export for recruiters:
+#   python candidate_store.py export candidates.csv
+#   python candidate_store.py export candidates.parquet --status completed
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DB_PATH = os.environ.get("JOBSAGE_DB_PATH", "candidates.db")
+MAX_BATCH = 500
+BATCH_WAIT_SECONDS = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interviews (
+    session_id TEXT PRIMARY KEY,
+    app TEXT NOT NULL,
+    status TEXT NOT NULL,
+    answers TEXT NOT NULL,
+    tech_questions TEXT NOT NULL,
+    tech_answers TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+UPSERT = """
+INSERT INTO interviews (session_id, app, status, answers, tech_questions, tech_answers, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(session_id) DO UPDATE SET
+    status = excluded.status,
+    answers = excluded.answers,
+    tech_questions = excluded.tech_questions,
+    tech_answers = excluded.tech_answers,
+    updated_at = excluded.updated_at
+"""
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(SCHEMA)
+    conn.commit()
+    return conn
+
+
+class CandidateStore:
+    def __init__(self, path=DB_PATH, max_queue=10000):
+        self.path = path
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.commits = 0
+        self.dropped = 0
+        self._writer = threading.Thread(target=self._run, name="candidate-store", daemon=True)
+        self._writer.start()
+
+    def save(self, session_id, app, status, answers, tech_questions=(), tech_answers=()):
+        # Queue a snapshot of the interview; never blocks the caller
+        now = time.time()
+        row = (
+            session_id, app, status,
+            json.dumps(answers), json.dumps(list(tech_questions)), json.dumps(list(tech_answers)),
+            now, now,
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        # Wait until everything queued so far is committed
+        self._queue.join()
+
+    def _run(self):
+        conn = connect(self.path)
+        while True:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT_SECONDS
+            while len(rows) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Only the latest snapshot of each session needs writing
+            latest = {}
+            for row in rows:
+                latest[row[0]] = row
+            try:
+                with conn:
+                    conn.executemany(UPSERT, list(latest.values()))
+                self.written += len(latest)
+                self.commits += 1
+            except sqlite3.Error:
+                self.dropped += len(latest)
+            for _ in rows:
+                self._queue.task_done()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    # Process-wide store, started on first use
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CandidateStore()
+            atexit.register(_store.flush)
+        return _store
+
+
+def save_interview(session_id, app, status, answers, tech_questions=(), tech_answers=()):
+    # status is "partial", "completed" or "ended" (stopped for inappropriate language);
+    # rows loaded with bulk_import.py have status "imported"
+    get_store().save(session_id, app, status, answers, tech_questions, tech_answers)
+
+
+def import_interviews(records, app, path=DB_PATH):
+    # Bulk insert (session_id, answers) pairs with status "imported" in one
+    # transaction, bypassing the chat write queue; returns the number written
+    now = time.time()
+    rows = [
+        (session_id, app, "imported", json.dumps(answers), "[]", "[]", now, now)
+        for session_id, answers in records
+    ]
+    conn = connect(path)
+    with conn:
+        conn.executemany(UPSERT, rows)
+    conn.close()
+    return len(rows)
+
+
+def load_interviews(path=DB_PATH, status=None):
+    # Read stored interviews as dicts with decoded answers
+    conn = connect(path)
+    query = "SELECT session_id, app, status, answers, tech_questions, tech_answers, created_at, updated_at FROM interviews"
+    params = ()
+    if status:
+        query += " WHERE status = ?"
+        params = (status,)
+    rows = []
+    for row in conn.execute(query + " ORDER BY created_at", params):
+        rows.append({
+            "session_id": row[0],
+            "app": row[1],
+            "status": row[2],
+            "answers": json.loads(row[3]),
+            "tech_questions": json.loads(row[4]),
+            "tech_answers": json.loads(row[5]),
+            "created_at": row[6],
+            "updated_at": row[7],
+        })
+    conn.close()
+    return rows
+
+
+def export(out_path, path=DB_PATH, status=None):
+    # One row per interview, one column per answer; CSV or Parquet by file extension
+    import pandas as pd
+
+    records = []
+    for interview in load_interviews(path, status):
+        record = {k: interview[k] for k in ("session_id", "app", "status", "created_at", "updated_at")}
+        record.update(interview["answers"])
+        for i, (q, a) in enumerate(zip(interview["tech_questions"], interview["tech_answers"]), start=1):
+            record[f"tech_q{i}"] = q
+            record[f"tech_a{i}"] = a
+        records.append(record)
+    df = pd.DataFrame.from_records(records)
+    if out_path.endswith(".parquet"):
+        df.to_parquet(out_path, index=False)
+    else:
+        df.to_csv(out_path, index=False)
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JobSage candidate store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="export interviews to CSV or Parquet")
+    export_parser.add_argument("out", help="output file (.csv or .parquet)")
+    export_parser.add_argument("--db", default=DB_PATH)
+    export_parser.add_argument("--status", choices=["partial", "completed", "ended", "imported"])
+    args = parser.parse_args()
+    count = export(args.out, args.db, args.status)
+    print(f"Exported {count} interviews to {args.out}")
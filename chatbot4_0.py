@@ -1,9 +1,20 @@
 import streamlit as st
-from transformers import pipeline
 import random
+import os
+import uuid
+from model_registry import get_pipeline
+from batching_server import run_pipeline
+from warmup import warm_up
+from metrics import begin_turn, end_turn, start_metrics_server
+from streaming import timed_stream, pipeline_text_stream
+from question_dedupe import QuestionDeduper
+from skill_taxonomy import canonical_skills
+from question_prompts import chatbot4_question_prompt, GPT2_GENERATION_KWARGS
+from question_bank import question_bank, ANY
 
-# Load Hugging Face text-generation model
-generator = pipeline("text-generation", model="gpt2")
+# Hugging Face text-generation model, loaded once per process on first use
+def get_generator():
+    return get_pipeline("text-generation", "gpt2")
 
 # Initialize session state
 if "step" not in st.session_state:
@@ -14,27 +25,40 @@ if "tech_questions" not in st.session_state:
     st.session_state.tech_questions = []
 if "tech_question_index" not in st.session_state:
     st.session_state.tech_question_index = 0
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Set JOBSAGE_STREAM=1 to show each question as it is being generated
+STREAM_OUTPUT = os.environ.get("JOBSAGE_STREAM") == "1"
 
 # Function to generate one unique, difficult skill-related question
 def generate_skill_question(skill, qnum):
-    prompt = (
-        f"Generate a challenging and in-depth technical interview question #{qnum} "
-        f"that evaluates advanced problem-solving ability in the skill: {skill}. "
-        f"The question should be scenario-based or require deep explanation, not a simple definition."
-    )
-    output = generator(
-        prompt,
-        max_length=120,
-        do_sample=True,
-        top_k=40,
-        top_p=0.9,
-        temperature=0.9,
-        repetition_penalty=2.5
-    )[0]['generated_text']
+    prompt = chatbot4_question_prompt(skill, qnum)
+    # Batched with concurrent sessions through the shared inference server
+    output = run_pipeline("text-generation", "gpt2", prompt, **GPT2_GENERATION_KWARGS)[0]['generated_text']
     return output.strip()
 
+# gpt2 echoes the prompt, so duplicate checks only compare the generated continuation
+def generated_part(text):
+    return text.split("not a simple definition.", 1)[-1]
+
+# Same as generate_skill_question, but yields text as tokens are generated
+def stream_skill_question(skill, qnum):
+    prompt = chatbot4_question_prompt(skill, qnum)
+    return timed_stream(pipeline_text_stream(get_generator(), prompt, **GPT2_GENERATION_KWARGS))
+
+# Close the current turn's trace before rerunning the script
+def rerun():
+    end_turn(st.session_state.step)
+    st.rerun()
+
 # ---------------- UI Flow ---------------- #
 
+start_metrics_server()
+# Preload heavy imports and models in the background when JOBSAGE_WARMUP=1
+warm_up("chatbot4")
+begin_turn(st.session_state.step, st.session_state.session_id)
+
 st.title("💡 AI Mock Interviewer")
 
 # Intro step
@@ -44,7 +68,7 @@ if st.session_state.step == "intro":
              "and finally, we’ll jump into 3 tough technical questions. 🚀")
     if st.button("Start"):
         st.session_state.step = "details"
-        st.rerun()
+        rerun()
 
 # Collect details
 elif st.session_state.step == "details":
@@ -57,9 +81,10 @@ elif st.session_state.step == "details":
             st.warning("Please fill out both fields!")
         else:
             st.session_state.answers["position"] = desired_position
-            st.session_state.answers["skills"] = [s.strip() for s in skills.split(",") if s.strip()]
+            # Canonical names, so "ReactJS, react.js" counts as one skill
+            st.session_state.answers["skills"] = canonical_skills(skills)
             st.session_state.step = "confirm"
-            st.rerun()
+            rerun()
 
 # Confirm details
 elif st.session_state.step == "confirm":
@@ -71,30 +96,38 @@ elif st.session_state.step == "confirm":
     
     if st.button("Yes, looks good! Proceed"):
         st.session_state.step = "questions"
-        st.rerun()
+        rerun()
     if st.button("Edit Details"):
         st.session_state.step = "details"
-        st.rerun()
+        rerun()
 
 # Interview questions
 elif st.session_state.step == "questions":
     skills = st.session_state.answers["skills"]
 
-    # pick exactly 3 random unique skills from provided list
-    selected_skills = random.sample(skills, 3) if len(skills) > 3 else skills
+    # Pick exactly 3 unique skills. The draw is seeded with the session id, so every
+    # rerun of a session picks the same skills
+    selected_skills = random.Random(st.session_state.session_id).sample(skills, 3) if len(skills) > 3 else skills
 
     if not st.session_state.tech_questions:
-        qlist = []
-        used_questions = set()
+        # Near-duplicate questions are regenerated a bounded number of times
+        deduper = QuestionDeduper(key=generated_part)
 
         for i, skill in enumerate(selected_skills, start=1):
-            while True:
-                q = generate_skill_question(skill, i)
-                if q not in used_questions:
-                    used_questions.add(q)
-                    qlist.append(q)
-                    break
-        st.session_state.tech_questions = qlist
+            def generate(skill=skill, i=i):
+                if STREAM_OUTPUT:
+                    # Show the question while it is being written, then clear the placeholder
+                    placeholder = st.empty()
+                    with placeholder:
+                        q = st.write_stream(stream_skill_question(skill, i)).strip()
+                    placeholder.empty()
+                    return q
+                return generate_skill_question(skill, i)
+
+            # A pre-generated question for the skill, if the question bank has one
+            banked = question_bank.draw("chatbot4", ANY, [skill], ANY, 1)
+            deduper.unique(banked[0] if banked else generate(), generate)
+        st.session_state.tech_questions = deduper.questions
 
     st.subheader("🎯 Interview Questions")
     idx = st.session_state.tech_question_index
@@ -103,7 +136,9 @@ elif st.session_state.step == "questions":
         st.markdown(f"**Q{idx+1}:** {st.session_state.tech_questions[idx]}")
         if st.button("Next Question"):
             st.session_state.tech_question_index += 1
-            st.rerun()
+            rerun()
     else:
         st.success("🎉 That’s the end of your mock interview! Great job!")
 
+# Record the turn when the script finishes without a rerun
+end_turn(st.session_state.step)
@@ -0,0 +1,158 @@
+# Offline grading of stored technical answers.
+# Reads interviews from the candidate store, scores every (question, answer)
+# pair from 1 to 5 with a local model on a CPU process pool and appends one JSON
+# line per graded answer to the output file. The output doubles as the checkpoint:
+# rerunning the same command skips answers already graded, so a crashed run
+# resumes where it stopped.
+#
+#   python grade_answers.py grades.jsonl --workers 4
+#   python grade_answers.py grades.jsonl --db candidates.db --status completed --backend int8
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+
+from candidate_store import DB_PATH, load_interviews
+from inference_backends import BACKENDS
+
+DEFAULT_MODEL = "google/flan-t5-small"
+GRADE_PROMPT = (
+    "Rate how well the candidate's answer addresses the interview question on a scale "
+    "from 1 (wrong or off-topic) to 5 (complete and correct). Reply with the number only.\n\n"
+    "Question: {question}\nAnswer: {answer}\nRating:"
+)
+MAX_ANSWER_CHARS = 2000
+
+
+def answer_items(db_path=DB_PATH, status=None):
+    # Yields (item id, session id, question number, question, answer) for every stored answer
+    for interview in load_interviews(db_path, status):
+        pairs = zip(interview["tech_questions"], interview["tech_answers"])
+        for number, (question, answer) in enumerate(pairs, start=1):
+            yield f"{interview['session_id']}:{number}", interview["session_id"], number, question, answer
+
+
+def parse_score(text):
+    match = re.search(r"[1-5]", text)
+    return int(match.group(0)) if match else None
+
+
+def read_checkpoint(path):
+    # Ids already graded. A last line cut short by a crash is dropped from the file
+    # so appending continues from the last complete record. Complete lines that do
+    # not parse are skipped (and their answers graded again), never cut away with
+    # the valid records after them.
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good_bytes = 0
+    bad_lines = []
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.endswith(b"\n"):
+                break
+            good_bytes += len(line)
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError, TypeError):
+                bad_lines.append(number)
+    if bad_lines:
+        print(f"Skipping {len(bad_lines)} malformed lines in {path} (first: line {bad_lines[0]})")
+    if good_bytes != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+
+# -------------------- Worker process --------------------
+
+_pipe = None
+_pipe_model = None
+
+
+def _init_worker(model, backend):
+    # One model per worker; one intra-op thread each so workers do not oversubscribe the CPU
+    global _pipe, _pipe_model
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    try:
+        import torch
+
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    from inference_backends import load_pipeline
+
+    _pipe = load_pipeline("text2text-generation", model, backend)
+    _pipe_model = model
+
+
+def _grade_batch(items):
+    prompts = [GRADE_PROMPT.format(question=q, answer=a[:MAX_ANSWER_CHARS]) for _, _, _, q, a in items]
+    outputs = _pipe(prompts, max_new_tokens=4, do_sample=False, batch_size=len(prompts))
+    results = []
+    for (item_id, session_id, number, question, answer), output in zip(items, outputs):
+        raw = output["generated_text"].strip()
+        results.append({
+            "id": item_id,
+            "session_id": session_id,
+            "question_number": number,
+            "question": question,
+            "answer": answer,
+            "score": parse_score(raw),
+            "raw": raw,
+            "model": _pipe_model,
+        })
+    return results
+
+
+# -------------------- Driver --------------------
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def grade(out_path, db_path=DB_PATH, status=None, workers=None, model=DEFAULT_MODEL, backend="pytorch",
+          batch_size=16, report_every=10.0):
+    # Returns (answers graded this run, seconds taken)
+    done = read_checkpoint(out_path)
+    pending = [item for item in answer_items(db_path, status) if item[0] not in done]
+    if done:
+        print(f"Resuming: {len(done)} answers already graded, {len(pending)} to go")
+    if not pending:
+        return 0, 0.0
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    graded = 0
+    start = last_report = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with open(out_path, "a", encoding="utf-8") as out, \
+            ctx.Pool(workers, initializer=_init_worker, initargs=(model, backend)) as pool:
+        for results in pool.imap_unordered(_grade_batch, _batches(pending, batch_size)):
+            for result in results:
+                out.write(json.dumps(result) + "\n")
+            # Make each finished batch durable before counting it as checkpointed
+            out.flush()
+            os.fsync(out.fileno())
+            graded += len(results)
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"{graded}/{len(pending)} answers, {graded / (now - start):.1f} answers/s")
+                last_report = now
+    return graded, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grade stored technical answers with a local model")
+    parser.add_argument("out", help="JSON lines output file; also the resume checkpoint")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--status", choices=["partial", "completed", "ended"])
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count - 1)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="text2text-generation model")
+    parser.add_argument("--backend", choices=BACKENDS, default="pytorch")
+    parser.add_argument("--batch-size", type=int, default=16, help="answers per model call")
+    args = parser.parse_args()
+    graded, elapsed = grade(args.out, args.db, args.status, args.workers, args.model, args.backend, args.batch_size)
+    rate = graded / elapsed if elapsed else 0.0
+    print(f"Graded {graded} answers in {elapsed:.1f}s ({rate:.1f} answers/s) -> {args.out}")
@@ -0,0 +1,79 @@
+# Pluggable CPU inference backends for the local question generators.
+# The backend is chosen with JOBSAGE_INFERENCE_BACKEND:
+#   pytorch - the default fp32 transformers pipeline
+#   int8    - same pipeline with nn.Linear layers dynamically quantized to int8
+#   onnx    - ONNX Runtime export of the same model through optimum
+# Every backend returns an object that is called exactly like a transformers
+# pipeline, so generate_skill_question does not change.
+import os
+import re
+
+BACKENDS = ("pytorch", "int8", "onnx")
+DEFAULT_BACKEND = os.environ.get("JOBSAGE_INFERENCE_BACKEND", "pytorch")
+
+# Prompts used by the correctness check, shaped like the apps' real prompts
+CHECK_PROMPTS = [
+    "Ask one interview question for a Python Developer role focusing on these skills: python, sql.",
+    "Ask one interview question for a Data Analyst role focusing on these skills: excel, statistics.",
+    "Generate a challenging and in-depth technical interview question #1 "
+    "that evaluates advanced problem-solving ability in the skill: React.",
+]
+
+
+def load_pipeline(task, model, backend=DEFAULT_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+    from transformers import pipeline
+
+    if backend == "pytorch":
+        return pipeline(task, model=model)
+
+    if backend == "int8":
+        import torch
+
+        pipe = pipeline(task, model=model)
+        # Only nn.Linear is quantized; gpt2's attention/MLP use Conv1D, so for it
+        # this mostly covers the (large) lm_head projection
+        pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipe
+
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer
+
+    model_class = ORTModelForSeq2SeqLM if task == "text2text-generation" else ORTModelForCausalLM
+    ort_model = model_class.from_pretrained(model, export=True)
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    return pipeline(task, model=ort_model, tokenizer=tokenizer)
+
+
+def greedy_kwargs(task, max_new_tokens=40):
+    # Deterministic generation settings for the check and the benchmark. A
+    # text-generation pipeline (gpt2) echoes the prompt in generated_text unless
+    # told otherwise, so only the continuation is returned.
+    kwargs = {"max_new_tokens": max_new_tokens, "do_sample": False}
+    if task == "text-generation":
+        kwargs["return_full_text"] = False
+    return kwargs
+
+
+def _words(text):
+    return set(re.findall(r"[a-z]+", text.lower()))
+
+
+def check_outputs(task, reference, candidate, prompts=CHECK_PROMPTS, min_overlap=0.3, **kwargs):
+    # Compare greedy outputs of two pipelines on the same prompts. Outputs are
+    # "reasonable" when none is empty and the mean word overlap (Jaccard) with
+    # the reference stays above min_overlap. Quantization changes logits slightly,
+    # so exact equality is not expected. Only generated text is compared, never
+    # the echoed prompt, which would pass both tests whatever the model produced.
+    kwargs = {**greedy_kwargs(task), **kwargs, "do_sample": False}
+    rows = []
+    for prompt in prompts:
+        ref = reference(prompt, **kwargs)[0]["generated_text"].strip()
+        out = candidate(prompt, **kwargs)[0]["generated_text"].strip()
+        a, b = _words(ref), _words(out)
+        overlap = len(a & b) / len(a | b) if a | b else 1.0
+        rows.append({"prompt": prompt, "reference": ref, "candidate": out, "overlap": round(overlap, 3)})
+    mean = sum(r["overlap"] for r in rows) / len(rows)
+    passed = all(r["candidate"] for r in rows) and mean >= min_overlap
+    return {"passed": passed, "mean_overlap": round(mean, 3), "rows": rows}
@@ -0,0 +1,86 @@
+# Compact per-candidate interview state for JobSage.py.
+# One __slots__ record replaces the loose st.session_state keys. The stage is a
+# small integer instead of several flags, personal answers are a list indexed by
+# integer field id instead of a dict keyed by question text, and transcripts are
+# derived from the answers rather than stored twice. to_bytes()/from_bytes() give
+# a small, fast serialization (a flat JSON array of the record's fields).
+import json
+import uuid
+from concurrent.futures import Future
+
+GREETING, PERSONAL, CONFIRM, CORRECTION, TECH, SUMMARY, ENDED = range(7)
+STAGE_NAMES = ("greeting", "personal", "confirm", "correction", "tech", "summary", "ended")
+
+FORMAT_VERSION = 1
+
+
+class InterviewSession:
+    __slots__ = (
+        "session_id", "stage", "step", "answers", "tech_questions", "tech_answers",
+        "tech_params", "swear_count", "tech_futures", "pending_moderation",
+    )
+    # Everything except the futures, which only live in this process; verdicts that
+    # already arrived are serialized separately so they are still enforced after a spill
+    SERIALIZED = __slots__[:-2]
+
+    def __init__(self, num_fields, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.stage = GREETING
+        self.step = 0                          # index of the next personal question
+        self.answers = [None] * num_fields     # personal answers by field id
+        self.tech_questions = []
+        self.tech_answers = []
+        self.tech_params = None                # (position, skills, experience) the questions were generated for
+        self.swear_count = 0
+        self.tech_futures = []                 # in-flight question generations
+        self.pending_moderation = []           # background moderation verdicts not enforced yet
+
+    @property
+    def stage_name(self):
+        return STAGE_NAMES[self.stage]
+
+    @property
+    def busy(self):
+        # Background work still running that a spill to disk would lose
+        return any(not f.done() for f in self.tech_futures + self.pending_moderation)
+
+    @property
+    def tech_index(self):
+        # Index of the technical question being asked
+        return len(self.tech_answers)
+
+    def answers_by_label(self, labels):
+        # {question label: answer} for the answered fields, as stored and exported
+        return {label: answer for label, answer in zip(labels, self.answers) if answer is not None}
+
+    def to_bytes(self):
+        values = [getattr(self, name) for name in self.SERIALIZED]
+        verdicts = [_verdict(f) for f in self.pending_moderation if f.done()]
+        return json.dumps([FORMAT_VERSION] + values + [verdicts], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data):
+        version, *values = json.loads(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported interview session format {version}")
+        session = cls.__new__(cls)
+        for name, value in zip(cls.SERIALIZED, values):
+            setattr(session, name, value)
+        if session.tech_params is not None:
+            session.tech_params = tuple(session.tech_params)
+        session.tech_futures = []
+        # Records spilled before verdicts were serialized end after the fields
+        verdicts = values[len(cls.SERIALIZED)] if len(values) > len(cls.SERIALIZED) else []
+        session.pending_moderation = [_resolved(v) for v in verdicts]
+        return session
+
+
+def _verdict(future):
+    # A failed check counts as polite, as when the verdict is enforced
+    return future.result() if future.exception() is None else True
+
+
+def _resolved(verdict):
+    future = Future()
+    future.set_result(verdict)
+    return future
@@ -0,0 +1,235 @@
+# Shared, resilient client for the OpenAI-compatible router API.
+# The client (and its HTTP keep-alive connection pool) is created once per
+# process instead of on every Streamlit rerun. chat() adds per-call deadlines,
+# jittered exponential retries, a circuit breaker and optional hedged requests.
+# Every upstream request first takes a slot from the process-wide rate scheduler
+# (see rate_scheduler.py), which orders waiting calls by priority and backs off on 429s.
+# openai and httpx are only imported by the first call, keeping them off the
+# cold-start path; failures are raised as LLMError so callers need neither.
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+
+from metrics import inc, register_collector
+from rate_scheduler import GENERATION, QueueFullError, scheduler
+
+BASE_URL = os.environ.get("JOBSAGE_BASE_URL", "https://router.huggingface.co/v1")
+MODEL = "openai/gpt-oss-120b:cerebras"
+DEFAULT_DEADLINE = float(os.environ.get("JOBSAGE_LLM_DEADLINE", "30"))
+MAX_RETRIES = int(os.environ.get("JOBSAGE_LLM_RETRIES", "2"))
+BASE_BACKOFF = 0.25
+MAX_BACKOFF = 4.0
+# Send a duplicate request when the first has not answered after this many seconds
+# (only for calls that ask for hedging); unset disables hedging
+HEDGE_AFTER = float(os.environ["JOBSAGE_HEDGE_AFTER"]) if os.environ.get("JOBSAGE_HEDGE_AFTER") else None
+
+
+class LLMError(Exception):
+    # Anything a caller should treat as "the LLM is unavailable"
+    pass
+
+
+class CircuitOpenError(LLMError):
+    pass
+
+
+def _retryable():
+    # Errors worth retrying: network problems, timeouts, throttling and 5xx responses
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+
+    return APIConnectionError, RateLimitError, InternalServerError, TimeoutError
+
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures and rejects calls for
+    # reset_timeout seconds; then lets a single trial call through (half-open) and
+    # closes on its success or re-opens on its failure. Other calls are rejected
+    # meanwhile; a trial that never reports back is replaced after reset_timeout.
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "open":
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+            elif now - self.probe_started < self.reset_timeout:
+                return False
+            self.probe_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    inc("llm_circuit_opened_total", help="times the LLM circuit breaker opened")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get("JOBSAGE_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.environ.get("JOBSAGE_BREAKER_RESET", "30")),
+)
+register_collector("llm_client", lambda: {
+    "llm_circuit_open": int(breaker.state == "open"),
+    "llm_circuit_consecutive_failures": breaker.failures,
+})
+
+_client = None
+_client_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def read_api_key():
+    # HF_API_KEY environment variable, or the key saved in mykey.txt
+    key = os.environ.get("HF_API_KEY")
+    if not key:
+        with open("mykey.txt") as f:
+            key = f.read().strip()
+    return key
+
+
+def get_client():
+    # One client per process; retries are handled by chat(), not by the SDK
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            from openai import OpenAI
+
+            http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+            )
+            _client = OpenAI(base_url=BASE_URL, api_key=read_api_key(), http_client=http_client, max_retries=0)
+        return _client
+
+
+def _stream_errors(stream):
+    # Errors while reading a streamed reply surface as LLMError as well
+    from openai import APIError
+
+    try:
+        yield from stream
+    except (APIError, TimeoutError) as exc:
+        raise LLMError(str(exc)) from exc
+
+
+def _call(messages, model, timeout, kwargs):
+    return get_client().chat.completions.create(model=model, messages=messages, timeout=timeout, **kwargs)
+
+
+def _retry_after(exc):
+    # Seconds from a 429's Retry-After header, if it has one
+    try:
+        return float(exc.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _hedged_call(messages, model, timeout, hedge_after, priority, kwargs):
+    # Start one request; if it has not finished after hedge_after seconds, start a
+    # duplicate and return whichever succeeds first. The duplicate is only sent if
+    # the rate scheduler has a slot free right away.
+    first = _hedge_pool.submit(_call, messages, model, timeout, kwargs)
+    done, _ = wait([first], timeout=hedge_after)
+    if done or not scheduler.try_acquire(priority):
+        try:
+            return first.result(timeout=max(0.0, timeout - hedge_after))
+        except FutureTimeoutError:
+            raise TimeoutError("LLM request exceeded its deadline")
+    inc("llm_hedged_requests_total", help="duplicate requests sent to cut tail latency")
+    pending = {first, _hedge_pool.submit(_call, messages, model, timeout - hedge_after, kwargs)}
+    error = None
+    end = time.monotonic() + timeout - hedge_after
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error or TimeoutError("LLM request exceeded its deadline")
+
+
+def chat(messages, model=MODEL, deadline=DEFAULT_DEADLINE, max_retries=MAX_RETRIES, hedge=False, purpose="llm",
+         priority=GENERATION, **kwargs):
+    # chat.completions.create with a total deadline (seconds) covering all retries
+    # and time spent queued in the rate scheduler at the given priority.
+    # Raises LLMError when the call fails or is shed, and CircuitOpenError without
+    # calling upstream while the breaker is open.
+    try:
+        result = _chat(messages, model, deadline, max_retries, hedge, purpose, priority, kwargs)
+    except LLMError:
+        raise
+    except Exception as exc:
+        from openai import APIError
+
+        if isinstance(exc, (APIError, TimeoutError, QueueFullError)):
+            raise LLMError(str(exc)) from exc
+        raise
+    return _stream_errors(result) if kwargs.get("stream") else result
+
+
+def _chat(messages, model, deadline, max_retries, hedge, purpose, priority, kwargs):
+    if not breaker.allow():
+        inc("llm_circuit_rejected_total", help="calls rejected by the open circuit breaker", purpose=purpose)
+        raise CircuitOpenError("LLM circuit breaker is open")
+    from openai import APIStatusError, RateLimitError
+
+    retryable = _retryable()
+    end = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        # Waiting for a slot counts against the deadline but not against the breaker
+        scheduler.acquire(priority, timeout=max(0.0, end - time.monotonic()))
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("LLM request exceeded its deadline")
+        try:
+            if hedge and HEDGE_AFTER and HEDGE_AFTER < remaining and not kwargs.get("stream"):
+                result = _hedged_call(messages, model, remaining, HEDGE_AFTER, priority, kwargs)
+            else:
+                result = _call(messages, model, remaining, kwargs)
+            breaker.record_success()
+            scheduler.record_success()
+            return result
+        except retryable as exc:
+            if isinstance(exc, RateLimitError):
+                scheduler.record_throttled(_retry_after(exc))
+            breaker.record_failure()
+            attempt += 1
+            # Full jitter keeps sessions that failed together from retrying in lockstep
+            backoff = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+            if attempt > max_retries or not breaker.allow() or time.monotonic() + backoff >= end:
+                raise
+            inc("llm_retries_total", help="LLM call retries", purpose=purpose)
+            time.sleep(backoff)
+        except Exception as exc:
+            # Not worth retrying, but the breaker still needs the outcome, or a
+            # half-open trial would hold it shut until reset_timeout. A 4xx means
+            # the API answered, so it counts as healthy.
+            if isinstance(exc, APIStatusError):
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            raise
@@ -0,0 +1,180 @@
+# Headless load test for JobSage.py.
+# Drives N simulated candidates through the full interview with Streamlit's
+# AppTest against a local stub of the chat-completions API, then reports
+# p50/p95/p99 latency per stage, throughput and memory per session.
+#
+# AppTest is not thread-safe, so each worker process interleaves --concurrency
+# live sessions turn by turn (they share the process-wide caches, pools and
+# background threads like sessions of one Streamlit server), and --processes
+# adds more worker processes.
+#
+#   python loadtest.py --candidates 50 --concurrency 10 --latency-ms 400 --error-rate 0.02
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from model_registry import current_rss_bytes
+from stub_openai_server import start_stub_server
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "JobSage.py")
+STAGES = ("greeting", "personal", "tech_generation", "moderation", "summary")
+
+PERSONAL_ANSWERS = [
+    "John Smith", "9876543210", "john.smith@example.com", "Delhi", "BTech",
+    "yes", "82", "NA", "3", "Python Developer", "python, sql, docker",
+]
+TECH_ANSWER = "I would profile the hot path first and then cache the expensive lookups"
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def candidate_session(timeout, timings):
+    # One candidate from greeting to summary, as a generator that yields after
+    # every turn so several sessions can be interleaved in one process
+    from streamlit.testing.v1 import AppTest
+
+    def step(stage, action):
+        start = time.perf_counter()
+        at = action()
+        timings[stage].append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"{stage}: {at.exception[0].message}")
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    step("greeting", at.run)
+    yield
+    step("greeting", lambda: at.chat_input[0].set_value("hi").run())
+    yield
+    for answer in PERSONAL_ANSWERS:
+        step("personal", lambda: at.chat_input[0].set_value(answer).run())
+        yield
+    # Confirming the details triggers (or collects the prefetched) technical questions
+    step("tech_generation", lambda: at.chat_input[0].set_value("yes").run())
+    yield
+    # Free-text answers go through the LLM moderation tier; the last one renders the summary
+    for i in range(5):
+        stage = "summary" if i == 4 else "moderation"
+        step(stage, lambda: at.chat_input[0].set_value(f"{TECH_ANSWER} ({i})").run())
+        yield
+    if not at.success:
+        raise RuntimeError("interview did not reach the summary")
+
+
+def run_worker(candidates, concurrency, timeout, env):
+    # Runs in a worker process: keep up to `concurrency` sessions alive and
+    # advance them round-robin, one turn each
+    os.environ.update(env)
+    timings = {stage: [] for stage in STAGES}
+    errors = []
+    rss_before = current_rss_bytes()
+    pending = candidates
+    active = []
+    while pending or active:
+        while pending and len(active) < concurrency:
+            active.append(candidate_session(timeout, timings))
+            pending -= 1
+        for session in list(active):
+            try:
+                next(session)
+            except StopIteration:
+                active.remove(session)
+            except Exception as exc:
+                errors.append(repr(exc))
+                active.remove(session)
+    # Imported by the app under test, so these are the calls of the sessions above
+    from question_fanout import generation_flight
+    return timings, errors, current_rss_bytes() - rss_before, generation_flight.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test for JobSage.py")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5, help="live sessions per worker process")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes")
+    parser.add_argument("--latency-ms", type=float, default=300, help="stub mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls failing with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of stub calls failing with 429")
+    parser.add_argument("--timeout", type=float, default=120, help="per-turn timeout in seconds")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+    )
+    workdir = tempfile.mkdtemp(prefix="jobsage-loadtest-")
+    env = {
+        "JOBSAGE_BASE_URL": base_url,
+        "HF_API_KEY": "stub",
+        "JOBSAGE_DB_PATH": os.path.join(workdir, "candidates.db"),
+        "JOBSAGE_SESSION_DB": os.path.join(workdir, "sessions.db"),
+    }
+
+    shares = [args.candidates // args.processes + (i < args.candidates % args.processes) for i in range(args.processes)]
+    start = time.perf_counter()
+    timings = {stage: [] for stage in STAGES}
+    errors = []
+    rss_growth = 0
+    generation_calls = coalesced_calls = 0
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        results = [pool.apply_async(run_worker, (n, args.concurrency, args.timeout, env)) for n in shares if n]
+        for result in results:
+            worker_timings, worker_errors, worker_rss, flight = result.get()
+            for stage, values in worker_timings.items():
+                timings[stage].extend(values)
+            errors.extend(worker_errors)
+            rss_growth += worker_rss
+            generation_calls += flight["calls"]
+            coalesced_calls += flight["coalesced"]
+    elapsed = time.perf_counter() - start
+    completed = args.candidates - len(errors)
+
+    report = {
+        "candidates": args.candidates,
+        "concurrency": args.concurrency,
+        "processes": args.processes,
+        "completed": completed,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_candidates_per_min": round(completed / elapsed * 60, 2),
+        "rss_per_session_kb": round(rss_growth / max(args.candidates, 1) / 1024, 1),
+        "upstream_requests": server.RequestHandlerClass.config.requests,
+        "generation_calls": generation_calls,
+        "coalesced_generation_calls": coalesced_calls,
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 1) if values else None,
+                "p95_ms": round(percentile(values, 95) * 1000, 1) if values else None,
+                "p99_ms": round(percentile(values, 99) * 1000, 1) if values else None,
+            }
+            for stage, values in timings.items()
+        },
+        "sample_errors": errors[:5],
+    }
+    server.shutdown()
+
+    print(f"{'stage':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, row in report["stages"].items():
+        print(f"{stage:<16}{row['count']:>7}{str(row['p50_ms']):>10}{str(row['p95_ms']):>10}{str(row['p99_ms']):>10}")
+    print(f"completed {completed}/{args.candidates} in {report['elapsed_s']}s "
+          f"({report['throughput_candidates_per_min']} candidates/min), "
+          f"{report['errors']} errors, ~{report['rss_per_session_kb']} KB RSS per session, "
+          f"{report['upstream_requests']} upstream requests, "
+          f"{coalesced_calls}/{generation_calls} question generations coalesced")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# Process-wide instrumentation: counters, gauges and histograms for model calls
+# and stage transitions, exposed in Prometheus text format or as JSON.
+#
+#   JOBSAGE_METRICS_PORT=9100  serve /metrics (Prometheus) and /metrics.json
+#   JOBSAGE_TRACE_LOG=trace.jsonl  append one line per rerun showing where its time went
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+_help = {}
+_collectors = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, help="", **labels):
+    with _lock:
+        _help.setdefault(name, help)
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, help="", **labels):
+    with _lock:
+        _help.setdefault(name, help)
+        _gauges[_key(name, labels)] = value
+
+
+def add_gauge(name, delta, help="", **labels):
+    with _lock:
+        _help.setdefault(name, help)
+        key = _key(name, labels)
+        _gauges[key] = _gauges.get(key, 0) + delta
+
+
+def observe(name, value, help="", buckets=DEFAULT_BUCKETS, **labels):
+    # Histogram observation; bucket counts are stored non-cumulatively
+    with _lock:
+        _help.setdefault(name, help)
+        key = _key(name, labels)
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+        hist["counts"][bisect.bisect_left(hist["buckets"], value)] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+def safe_name(text):
+    # Turn a model or key name into a valid metric name fragment
+    return re.sub(r"[^a-zA-Z0-9_]", "_", text)
+
+
+def register_collector(name, collect):
+    # collect() -> {metric_name: value} read at export time, e.g. cache hit counts.
+    # Registering the same name again replaces the previous collector.
+    with _lock:
+        _collectors[name] = collect
+
+
+# -------------------- Model call tracking --------------------
+
+@contextmanager
+def track(name, **labels):
+    # Time a block: <name>_seconds histogram, <name>_total and <name>_errors_total
+    # counters and a <name>_in_flight gauge. Also adds a span to the current turn trace.
+    add_gauge(f"{name}_in_flight", 1, help=f"{name} calls in progress", **labels)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc(f"{name}_errors_total", help=f"failed {name} calls", **labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        add_gauge(f"{name}_in_flight", -1, **labels)
+        inc(f"{name}_total", help=f"{name} calls", **labels)
+        observe(f"{name}_seconds", elapsed, help=f"{name} latency in seconds", **labels)
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace["spans"].append({"name": name, **labels, "ms": round(elapsed * 1000, 2)})
+
+
+def record_tokens(usage, **labels):
+    # Token counts from an OpenAI-compatible completion's usage field
+    if usage is None:
+        return
+    inc("llm_prompt_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, help="prompt tokens sent", **labels)
+    inc("llm_completion_tokens_total", getattr(usage, "completion_tokens", 0) or 0, help="completion tokens received", **labels)
+
+
+# -------------------- Per-turn traces --------------------
+
+_local = threading.local()
+TRACE_LOG = os.environ.get("JOBSAGE_TRACE_LOG")
+_trace_lock = threading.Lock()
+
+
+def begin_turn(stage, session_id=None):
+    # Called at the top of every rerun; Streamlit runs each session's script in its own thread
+    _local.trace = {"session": session_id, "stage": stage, "start": time.perf_counter(), "spans": []}
+
+
+def in_turn():
+    # True between begin_turn and end_turn in this thread, e.g. to tell a fragment
+    # rerun (no turn started) from a fragment running as part of a full rerun
+    return getattr(_local, "trace", None) is not None
+
+
+def end_turn(next_stage=None):
+    # Called before st.rerun() and at the end of the script
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return
+    _local.trace = None
+    elapsed = time.perf_counter() - trace["start"]
+    observe("turn_seconds", elapsed, help="script rerun time by stage", stage=trace["stage"])
+    if next_stage and next_stage != trace["stage"]:
+        inc("stage_transitions_total", help="stage transitions", **{"from": trace["stage"], "to": next_stage})
+    if TRACE_LOG:
+        line = json.dumps({
+            "ts": time.time(), "session": trace["session"], "stage": trace["stage"], "next_stage": next_stage,
+            "total_ms": round(elapsed * 1000, 2), "spans": trace["spans"],
+        })
+        with _trace_lock, open(TRACE_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+# -------------------- Export --------------------
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _collected():
+    values = {}
+    for collect in list(_collectors.values()):
+        try:
+            values.update(collect())
+        except Exception:
+            pass
+    return values
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        families = {}
+        for (name, labels), value in _counters.items():
+            families.setdefault((name, "counter"), []).append((labels, value))
+        for (name, labels), value in _gauges.items():
+            families.setdefault((name, "gauge"), []).append((labels, value))
+        for (name, kind), samples in sorted(families.items()):
+            if _help.get(name):
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        hist_names = sorted({name for name, _ in _histograms})
+        for name in hist_names:
+            if _help.get(name):
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for (hname, labels), hist in _histograms.items():
+                if hname != name:
+                    continue
+                running = 0
+                for bound, count in zip(list(hist["buckets"]) + ["+Inf"], hist["counts"]):
+                    running += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {running}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+    for name, value in sorted(_collected().items()):
+        if isinstance(value, (int, float)):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    # JSON-friendly view of every metric
+    def label_str(labels):
+        return ",".join(f"{k}={v}" for k, v in labels)
+
+    with _lock:
+        data = {
+            "counters": {f"{n}{{{label_str(l)}}}": v for (n, l), v in _counters.items()},
+            "gauges": {f"{n}{{{label_str(l)}}}": v for (n, l), v in _gauges.items()},
+            "histograms": {
+                f"{n}{{{label_str(l)}}}": {
+                    "count": h["count"],
+                    "sum": round(h["sum"], 6),
+                    "mean": round(h["sum"] / h["count"], 6) if h["count"] else None,
+                    "buckets": dict(zip([str(b) for b in h["buckets"]] + ["+Inf"], h["counts"])),
+                }
+                for (n, l), h in _histograms.items()
+            },
+        }
+    data["collected"] = _collected()
+    return data
+
+
+def dump_json(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def _metrics_handler():
+    # http.server is only imported when the endpoint is enabled
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(snapshot()).encode(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = render_prometheus().encode(), "text/plain; version=0.0.4"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return MetricsHandler
+
+
+_server = None
+
+
+def start_metrics_server(port=None):
+    # Start the metrics endpoint once per process; a no-op without a port
+    global _server
+    port = port or os.environ.get("JOBSAGE_METRICS_PORT")
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        from http.server import ThreadingHTTPServer
+
+        _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _metrics_handler())
+        _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
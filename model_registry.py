@@ -0,0 +1,150 @@
+# Process-wide registry for Hugging Face pipelines.
+# Streamlit re-executes the app script on every interaction, but imported modules
+# stay loaded, so models kept here are built once per process and shared by
+# every session instead of being reloaded on each rerun.
+import os
+import threading
+import time
+
+from inference_backends import DEFAULT_BACKEND, load_pipeline
+from metrics import register_collector, safe_name
+
+try:
+    import resource
+except ImportError:  # resource is not available on Windows
+    resource = None
+
+
+def current_rss_bytes():
+    # Resident memory of this process, read from /proc when available
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrss is the peak value, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return 0
+
+
+class _Entry:
+    # One registered model with its loader, the loaded object and its metrics
+    def __init__(self, loader):
+        self.loader = loader
+        self.model = None
+        self.lock = threading.Lock()
+        self.load_count = 0
+        self.load_seconds = 0.0
+        self.memory_bytes = 0
+        self.last_used = 0.0
+        self.hits = 0
+
+
+class ModelRegistry:
+    def __init__(self, idle_timeout=None):
+        # idle_timeout (seconds): models unused for longer than this are evicted
+        # by evict_idle(); None keeps them loaded for the life of the process
+        self.idle_timeout = idle_timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        # Register a zero-argument loader; nothing is loaded until get() is called
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(loader)
+            return self._entries[name]
+
+    def get(self, name, loader=None):
+        # Return the shared model, loading it on first use.
+        # The per-entry lock makes concurrent sessions wait for one load
+        # instead of each building their own copy.
+        entry = self._entries.get(name)
+        if entry is None:
+            if loader is None:
+                raise KeyError(f"No model registered under {name!r}")
+            entry = self.register(name, loader)
+        with entry.lock:
+            if entry.model is None:
+                rss_before = current_rss_bytes()
+                start = time.perf_counter()
+                entry.model = entry.loader()
+                entry.load_seconds = time.perf_counter() - start
+                entry.memory_bytes = max(current_rss_bytes() - rss_before, 0)
+                entry.load_count += 1
+            else:
+                entry.hits += 1
+            entry.last_used = time.monotonic()
+            return entry.model
+
+    def is_loaded(self, name):
+        entry = self._entries.get(name)
+        return entry is not None and entry.model is not None
+
+    def evict(self, name):
+        # Drop the shared reference so the weights can be garbage collected
+        entry = self._entries.get(name)
+        if entry is None:
+            return False
+        with entry.lock:
+            loaded = entry.model is not None
+            entry.model = None
+            entry.memory_bytes = 0
+        return loaded
+
+    def evict_idle(self, max_idle_seconds=None):
+        # Evict every model that has not been used within max_idle_seconds
+        max_idle = self.idle_timeout if max_idle_seconds is None else max_idle_seconds
+        if max_idle is None:
+            return []
+        now = time.monotonic()
+        evicted = []
+        for name, entry in list(self._entries.items()):
+            if entry.model is not None and now - entry.last_used > max_idle:
+                if self.evict(name):
+                    evicted.append(name)
+        return evicted
+
+    def metrics(self):
+        # Per-model load time, estimated memory and usage, plus process RSS
+        now = time.monotonic()
+        models = {}
+        for name, entry in list(self._entries.items()):
+            models[name] = {
+                "loaded": entry.model is not None,
+                "load_count": entry.load_count,
+                "load_seconds": round(entry.load_seconds, 3),
+                "memory_bytes": entry.memory_bytes,
+                "hits": entry.hits,
+                "idle_seconds": round(now - entry.last_used, 1) if entry.last_used else None,
+            }
+        return {"process_rss_bytes": current_rss_bytes(), "models": models}
+
+
+# Idle timeout can be set from the environment, e.g. JOBSAGE_MODEL_IDLE_TIMEOUT=1800
+_idle = os.environ.get("JOBSAGE_MODEL_IDLE_TIMEOUT")
+registry = ModelRegistry(idle_timeout=float(_idle) if _idle else None)
+
+
+def _collect():
+    values = {"process_rss_bytes": current_rss_bytes()}
+    for name, m in registry.metrics()["models"].items():
+        label = safe_name(name)
+        values[f"model_loaded_{label}"] = int(m["loaded"])
+        values[f"model_load_seconds_{label}"] = m["load_seconds"]
+        values[f"model_memory_bytes_{label}"] = m["memory_bytes"]
+    return values
+
+
+register_collector("model_registry", _collect)
+
+
+def get_pipeline(task, model, backend=None):
+    # Shared pipeline for (task, model), loaded lazily on first use with the
+    # configured inference backend (see inference_backends.py)
+    backend = backend or DEFAULT_BACKEND
+    generator = registry.get(f"{task}:{model}:{backend}", lambda: load_pipeline(task, model, backend))
+    registry.evict_idle()
+    return generator
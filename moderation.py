@@ -0,0 +1,207 @@
+# Tiered politeness check that runs before the LLM moderation call.
+# Tier 1 is a local lexicon matcher (Aho-Corasick over normalized text) that
+# handles obvious cases and structurally validated answers in microseconds; other
+# free text is sent to the LLM, and its verdicts are kept in a bounded LRU cache.
+# check_message_background() runs that LLM check on a small dedicated pool and
+# returns a Future, for callers that enforce the verdict later instead of waiting.
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import register_collector
+
+POLITE = "polite"
+IMPOLITE = "impolite"
+AMBIGUOUS = "ambiguous"
+
+# Lexicon entries. Stems also match longer words starting with them
+# ("fuck" -> "fucking"); words only match as a whole word. Anything that starts
+# an ordinary word is listed as words: "shit" (shiitake, after collapsing
+# repeats), "retard" (retardant, retardation), "slut" (Slutsky).
+PROFANE_STEMS = [
+    "fuck", "bitch", "bastard", "cunt", "asshole", "motherf", "bullshit",
+    "dickhead", "wanker", "whore", "jackass", "dumbass",
+]
+PROFANE_WORDS = [
+    "shit", "shits", "shitty", "shitting", "shithead", "retard", "retards", "retarded",
+    "slut", "sluts", "slutty", "damn", "dammit", "crap", "piss", "pissed", "prick",
+    "twat", "idiot", "idiots", "moron", "morons", "stupid", "wtf", "stfu",
+]
+
+# Common leetspeak / symbol substitutions
+LEET_MAP = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s", "!": "i", "|": "i", "+": "t", "€": "e",
+})
+
+# Short replies that never need the LLM
+TRIVIAL_REPLIES = {"hi", "hello", "hey", "yes", "no", "na", "n/a", "ok", "okay", "thanks", "thank you"}
+
+_REPEATS = re.compile(r"(.)\1+")
+_NON_LETTERS = re.compile(r"[^a-z]+")
+
+
+def _collapse(text):
+    # "fuuuuck" -> "fuck"; applied to both the lexicon and the input
+    return _REPEATS.sub(r"\1", text)
+
+
+def normalize(message):
+    # Lowercase, undo leetspeak, split on anything that is not a letter and
+    # collapse repeated letters. Returns the list of normalized words.
+    text = message.lower().translate(LEET_MAP)
+    return [_collapse(w) for w in _NON_LETTERS.split(text) if w]
+
+
+class AhoCorasick:
+    # Multi-pattern matcher: one pass over the text finds every lexicon entry
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = nxt
+        self.output[node].append(pattern)
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def search(self, text):
+        # Return the first matching pattern, or None
+        node = 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            if self.output[node]:
+                return self.output[node][0]
+        return None
+
+
+# Word-bounded matcher over " word word " text: stems are anchored at a word
+# start, whole words at both ends. Obfuscations it misses ("f u c k") are free
+# text and go to the LLM.
+_stems = [_collapse(w) for w in PROFANE_STEMS]
+_words = [_collapse(w) for w in PROFANE_WORDS]
+_bounded_matcher = AhoCorasick([" " + w for w in _stems] + [" " + w + " " for w in _words])
+
+
+def classify(message, validated=False):
+    # Local verdict: POLITE, IMPOLITE or AMBIGUOUS (needs the LLM).
+    # validated=True means the message already passed a structural validator
+    # (phone, email, yes/no, ...), so a clean lexicon check is enough. Other free
+    # text always goes to the LLM, however short: "shut up" has no lexicon hit.
+    words = normalize(message)
+    if _bounded_matcher.search(" " + " ".join(words) + " "):
+        return IMPOLITE
+    if validated or message.strip().lower() in TRIVIAL_REPLIES:
+        return POLITE
+    return AMBIGUOUS
+
+
+class VerdictCache:
+    # Thread-safe bounded LRU cache of LLM verdicts keyed on normalized text
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Shared by every session in the process
+verdict_cache = VerdictCache()
+# Separate from the question generation pool, so background checks never queue behind generations
+moderation_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("JOBSAGE_MODERATION_WORKERS", "8")),
+    thread_name_prefix="moderation",
+)
+stats = {"local_polite": 0, "local_impolite": 0, "llm_calls": 0}
+register_collector("moderation", lambda: {
+    **{f"moderation_{k}": v for k, v in stats.items()},
+    "moderation_cache_hits": verdict_cache.hits,
+    "moderation_cache_misses": verdict_cache.misses,
+})
+
+
+def _known_verdict(message, validated):
+    # (polite, cache key): polite is True/False when the lexicon or the cache
+    # decides, or None when the message needs the LLM
+    verdict = classify(message, validated)
+    if verdict == POLITE:
+        stats["local_polite"] += 1
+        return True, None
+    if verdict == IMPOLITE:
+        stats["local_impolite"] += 1
+        return False, None
+    key = " ".join(normalize(message))
+    return verdict_cache.get(key), key
+
+
+def _llm_verdict(key, message, llm_check):
+    stats["llm_calls"] += 1
+    polite = llm_check(message)
+    if polite is None:
+        # The check failed: let this message through, but ask again next time
+        return True
+    verdict_cache.put(key, polite)
+    return polite
+
+
+def check_message(message, llm_check, validated=False):
+    # Return True if the message is polite. llm_check(message) -> bool is only
+    # called for ambiguous messages whose verdict is not cached yet; it returns
+    # None when it could not decide, and the message is then treated as polite.
+    polite, key = _known_verdict(message, validated)
+    if polite is not None:
+        return polite
+    return _llm_verdict(key, message, llm_check)
+
+
+def check_message_background(message, llm_check, validated=False):
+    # Same as check_message, but when the LLM is needed the check runs on the
+    # moderation pool and a Future of the verdict is returned instead of a bool
+    polite, key = _known_verdict(message, validated)
+    if polite is not None:
+        return polite
+    return moderation_executor.submit(_llm_verdict, key, message, llm_check)
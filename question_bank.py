@@ -0,0 +1,318 @@
+# Offline bank of pre-generated technical questions.
+# A batch CLI generates questions for a grid of position x skill x difficulty with
+# the apps' own prompts (question_prompts.py) on a worker pool and writes them to
+# one compact file: a header, an open-addressing hash index of fixed-size slots and
+# the question lists as JSON records. The apps memory-map the file at startup, so
+# opening it costs next to nothing whatever its size and a lookup is one or two
+# slot probes plus decoding the one record it points to. Combinations the bank
+# does not cover fall back to the question cache and the model.
+#
+#   python question_bank.py build question_bank.bin --app jobsage \
+#       --positions "Python Developer" "Data Scientist" --skills Python SQL React \
+#       --difficulties moderate advanced --per-key 10 --workers 8
+#   python question_bank.py build question_bank.bin --app jobsage --grid grid.json
+#   python question_bank.py show question_bank.bin --app jobsage --position "Python Developer" --skill python
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import register_collector
+from question_cache import normalize_position
+from skill_taxonomy import canonical_skill, canonical_skills
+
+logger = logging.getLogger(__name__)
+
+BANK_PATH = os.environ.get("JOBSAGE_QUESTION_BANK", "question_bank.bin")
+MAGIC = b"JSQB"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")  # magic, version, number of slots (a power of two), number of entries
+SLOT = struct.Struct("<QQI")      # key hash, record offset, record length (0 = empty slot)
+# Dimensions an app's prompt does not use are stored as this value
+ANY = "*"
+
+
+def bank_key(app, position, skill, difficulty):
+    return "|".join([app, normalize_position(position), canonical_skill(skill).lower(), difficulty])
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class QuestionBank:
+    def __init__(self, path=BANK_PATH):
+        # A missing file is an empty bank, and so is a damaged one (with a warning):
+        # the apps then fall back to the question cache and the model
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._map = None
+        self._mask = 0
+        self.keys = 0
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        try:
+            magic, version, slots, keys = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = version = slots = keys = None
+        if magic != MAGIC or version != VERSION or not slots or slots & (slots - 1) \
+                or len(self._map) < HEADER.size + slots * SLOT.size:
+            logger.warning("%s is not a valid version %d question bank; ignoring it", path, VERSION)
+            self._map.close()
+            self._map = None
+            return
+        self.keys = keys
+        self._mask = slots - 1
+
+    def get(self, key):
+        # Question list stored under key, or None
+        if self._map is None:
+            return None
+        h = _hash(key)
+        i = h & self._mask
+        while True:
+            slot_hash, offset, length = SLOT.unpack_from(self._map, HEADER.size + i * SLOT.size)
+            if length == 0 or offset + length > len(self._map):
+                # Empty slot, or a record cut off by a truncated file
+                return None
+            if slot_hash == h:
+                stored_key, questions = json.loads(self._map[offset:offset + length])
+                if stored_key == key:
+                    return questions
+            i = (i + 1) & self._mask
+
+    def items(self):
+        # (key, questions) for every entry, in index order
+        if self._map is None:
+            return
+        for i in range(self._mask + 1):
+            _, offset, length = SLOT.unpack_from(self._map, HEADER.size + i * SLOT.size)
+            if length and offset + length <= len(self._map):
+                key, questions = json.loads(self._map[offset:offset + length])
+                yield key, questions
+
+    def _pools(self, app, position, skills, difficulty):
+        # One question list per canonical skill, or None if any skill is not covered
+        pools = []
+        for skill in canonical_skills(skills):
+            questions = self.get(bank_key(app, position, skill, difficulty))
+            if not questions:
+                return None
+            pools.append(questions)
+        return pools or None
+
+    def draw(self, app, position, skills, difficulty, n):
+        # n distinct questions spread round-robin over the candidate's skills, or None
+        # unless the bank covers every skill and holds enough questions
+        pools = self._pools(app, position, skills, difficulty)
+        picked = []
+        if pools:
+            shuffled = [random.sample(pool, len(pool)) for pool in pools]
+            for round_ in range(max(len(pool) for pool in shuffled)):
+                for pool in shuffled:
+                    if round_ < len(pool) and pool[round_] not in picked:
+                        picked.append(pool[round_])
+        with self._lock:
+            if len(picked) < n:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return picked[:n]
+
+    def sample(self, app, position, skills, difficulty, n):
+        # Up to n questions for whichever of the skills are covered; used as a fallback
+        # while the model is unavailable and not counted as a hit or miss
+        pool = []
+        for skill in canonical_skills(skills):
+            pool.extend(self.get(bank_key(app, position, skill, difficulty)) or [])
+        pool = list(dict.fromkeys(pool))
+        return random.sample(pool, min(n, len(pool)))
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "keys": self.keys}
+
+
+def write_bank(path, entries):
+    # entries: {key: [questions]}. Written to a temporary file and renamed, so
+    # processes that have the old bank mapped keep reading a consistent file.
+    slots = 8
+    while slots < 2 * len(entries):
+        slots *= 2
+    index = [(0, 0, 0)] * slots
+    data_start = HEADER.size + slots * SLOT.size
+    records = []
+    offset = data_start
+    for key, questions in entries.items():
+        record = json.dumps([key, questions], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        h = _hash(key)
+        i = h & (slots - 1)
+        while index[i][2]:
+            i = (i + 1) & (slots - 1)
+        index[i] = (h, offset, len(record))
+        records.append(record)
+        offset += len(record)
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, slots, len(entries)))
+        for slot in index:
+            f.write(SLOT.pack(*slot))
+        for record in records:
+            f.write(record)
+    os.replace(tmp, path)
+
+
+# -------------------- Building --------------------
+
+def _jobsage_generator():
+    from llm_client import chat
+    from question_prompts import jobsage_question_prompt
+
+    def generate(position, skill, difficulty):
+        completion = chat([{"role": "user", "content": jobsage_question_prompt(position, skill, difficulty)}],
+                          purpose="question_bank")
+        return completion.choices[0].message.content.strip()
+    return generate
+
+
+def _chatbot2_generator():
+    from batching_server import run_pipeline
+    from question_prompts import chatbot2_question_prompt
+
+    def generate(position, skill, difficulty):
+        prompt = chatbot2_question_prompt(position, skill)
+        return run_pipeline("text2text-generation", "google/flan-t5-small", prompt, max_length=150)[0]["generated_text"].strip()
+    return generate
+
+
+def _chatbot4_generator():
+    from batching_server import run_pipeline
+    from question_prompts import GPT2_GENERATION_KWARGS, chatbot4_question_prompt
+
+    def generate(position, skill, difficulty):
+        prompt = chatbot4_question_prompt(skill, 1)
+        return run_pipeline("text-generation", "gpt2", prompt, **GPT2_GENERATION_KWARGS)[0]["generated_text"].strip()
+    return generate
+
+
+# app -> (generator factory, whether the prompt uses the position, the difficulty)
+APPS = {
+    "jobsage": (_jobsage_generator, True, True),
+    "chatbot2": (_chatbot2_generator, True, False),
+    "chatbot4": (_chatbot4_generator, False, False),
+}
+
+
+def grid_keys(app, positions, skills, difficulties):
+    # (key, position, skill, difficulty) for every cell; unused dimensions collapse to ANY
+    _, uses_position, uses_difficulty = APPS[app]
+    positions = positions if uses_position else [ANY]
+    difficulties = difficulties if uses_difficulty else [ANY]
+    cells = {}
+    for position in positions:
+        for skill in canonical_skills(skills):
+            for difficulty in difficulties:
+                cells.setdefault(bank_key(app, position, skill, difficulty), (position, skill, difficulty))
+    return [(key,) + cell for key, cell in cells.items()]
+
+
+def _generate_cell(generate, position, skill, difficulty, per_key):
+    from question_dedupe import QuestionDeduper
+
+    # gpt2 echoes the chatbot4 prompt, so only the continuation is compared (a no-op for the other apps)
+    deduper = QuestionDeduper(key=(lambda q: q.split("not a simple definition.", 1)[-1]))
+    regenerate = lambda: generate(position, skill, difficulty)
+    for _ in range(per_key):
+        deduper.unique(regenerate(), regenerate)
+    return deduper.questions
+
+
+def build(path, app, positions, skills, difficulties, per_key=10, workers=8, checkpoint_every=50, report_every=10.0):
+    # Generate the grid's missing cells and merge them into the bank at path.
+    # The bank is rewritten every checkpoint_every cells, so an interrupted build
+    # resumes from the cells already written. Returns (cells built, seconds taken).
+    entries = dict(QuestionBank(path).items())
+    pending = [cell for cell in grid_keys(app, positions, skills, difficulties) if cell[0] not in entries]
+    if entries:
+        print(f"{len(entries)} cells already in {path}, {len(pending)} to go")
+    if not pending:
+        return 0, 0.0
+    generate = APPS[app][0]()
+    built = 0
+    start = last_report = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-bank") as pool:
+        futures = {pool.submit(_generate_cell, generate, position, skill, difficulty, per_key): key
+                   for key, position, skill, difficulty in pending}
+        for future in as_completed(futures):
+            try:
+                entries[futures[future]] = future.result()
+            except Exception as exc:
+                print(f"{futures[future]}: {exc}")
+                continue
+            built += 1
+            if built % checkpoint_every == 0:
+                write_bank(path, entries)
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"{built}/{len(pending)} cells, {built * per_key / (now - start):.1f} questions/s")
+                last_report = now
+    write_bank(path, entries)
+    return built, time.perf_counter() - start
+
+
+# Process-wide bank opened at import; set JOBSAGE_QUESTION_BANK to its path
+question_bank = QuestionBank()
+register_collector("question_bank", lambda: {f"question_bank_{k}": v for k, v in question_bank.stats().items()})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate technical questions into a question bank")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="generate a position x skill x difficulty grid")
+    build_cmd.add_argument("path")
+    build_cmd.add_argument("--app", choices=APPS, default="jobsage", help="whose prompts to use")
+    build_cmd.add_argument("--grid", help='JSON file with "positions", "skills" and "difficulties" lists')
+    build_cmd.add_argument("--positions", nargs="+", default=[])
+    build_cmd.add_argument("--skills", nargs="+", default=[])
+    build_cmd.add_argument("--difficulties", nargs="+", default=["moderate", "advanced"])
+    build_cmd.add_argument("--per-key", type=int, default=10, help="questions per grid cell")
+    build_cmd.add_argument("--workers", type=int, default=8)
+    show_cmd = commands.add_parser("show", help="print the questions of one cell, or bank statistics")
+    show_cmd.add_argument("path")
+    show_cmd.add_argument("--app", choices=APPS, default="jobsage")
+    show_cmd.add_argument("--position", default=ANY)
+    show_cmd.add_argument("--skill")
+    show_cmd.add_argument("--difficulty", default=ANY)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        grid = {"positions": args.positions, "skills": args.skills, "difficulties": args.difficulties}
+        if args.grid:
+            with open(args.grid, encoding="utf-8") as f:
+                grid.update(json.load(f))
+        if not grid["skills"] or (APPS[args.app][1] and not grid["positions"]):
+            parser.error("the grid needs skills" + (" and positions" if APPS[args.app][1] else ""))
+        built, elapsed = build(args.path, args.app, grid["positions"], grid["skills"], grid["difficulties"],
+                               args.per_key, args.workers)
+        print(f"Built {built} cells in {elapsed:.1f}s -> {args.path} ({os.path.getsize(args.path)} bytes)")
+    else:
+        bank = QuestionBank(args.path)
+        if args.skill:
+            for q in bank.get(bank_key(args.app, args.position, args.skill, args.difficulty)) or []:
+                print(q)
+        else:
+            print(f"{bank.keys} cells, {os.path.getsize(args.path)} bytes")
@@ -0,0 +1,169 @@
+# Cache of generated technical questions shared by all sessions in the process.
+# Entries are keyed on the normalized position, the sorted set of canonical
+# skills and the difficulty bucket, and hold a pool of questions so each
+# candidate still gets a random draw instead of the exact same set.
+import atexit
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import register_collector
+from question_dedupe import QuestionDeduper
+from skill_taxonomy import canonical_skills
+
+
+def difficulty_bucket(experience):
+    # Same rule as the prompts: under 2 years is moderate, otherwise advanced
+    try:
+        return "moderate" if int(experience) < 2 else "advanced"
+    except (TypeError, ValueError):
+        return "moderate"
+
+
+def normalize_position(position):
+    return re.sub(r"\s+", " ", position.strip().lower())
+
+
+def normalize_skills(skills):
+    # Accepts the raw comma-separated answer or a list of skills; aliases and typos
+    # of known skills map to one canonical name ("ReactJS" and "react.js" are "react")
+    return tuple(sorted({s.lower() for s in canonical_skills(skills)}))
+
+
+def question_cache_key(position, skills, experience, namespace="jobsage"):
+    # namespace separates apps whose prompts differ
+    return "|".join([
+        namespace,
+        normalize_position(position),
+        ",".join(normalize_skills(skills)),
+        difficulty_bucket(experience),
+    ])
+
+
+class QuestionCache:
+    def __init__(self, maxsize=512, ttl=24 * 3600, pool_size=15, path=None, flush_seconds=5):
+        # maxsize: number of keys kept (LRU eviction), ttl: seconds before a pool
+        # expires, pool_size: questions collected per key before serving draws,
+        # path: optional JSON file used to persist the cache across restarts,
+        # written every flush_seconds when it changed and at exit
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (created_at, [questions])
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._save_lock = threading.Lock()
+        if path:
+            self._load()
+            atexit.register(self.flush)
+            if flush_seconds:
+                threading.Thread(target=self._flush_loop, args=(flush_seconds,), name="question-cache-flush",
+                                 daemon=True).start()
+
+    def draw(self, key, n):
+        # Return n random questions from a full pool, or None on a miss
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is None or len(entry[1]) < max(n, self.pool_size):
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return random.sample(entry[1], n)
+
+    def sample(self, key, n):
+        # Up to n random questions from the key's pool even if it is not full yet.
+        # Used as a fallback while the model is unavailable; not counted as a hit or miss.
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                return []
+            return random.sample(entry[1], min(n, len(entry[1])))
+
+    def add(self, key, questions):
+        # Add freshly generated questions to the key's pool
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                entry = (time.time(), [])
+            pool = entry[1]
+            # Near-duplicates of pooled questions would make draws repetitive
+            deduper = QuestionDeduper(pool)
+            for q in questions:
+                if len(pool) < self.pool_size and not deduper.is_duplicate(q):
+                    pool.append(q)
+                    deduper.add(q)
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            self._dirty = True
+
+    def flush(self):
+        # Write the cache to path if it changed since the last write. Only the
+        # snapshot is taken under the lock; draws and adds never wait for the disk.
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                items = [[k, created, list(qs)] for k, (created, qs) in self._data.items()]
+                self._dirty = False
+            try:
+                self._save(items)
+            except OSError:
+                self._dirty = True
+                raise
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "keys": len(self._data)}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, created, questions in items:
+            if now - created <= self.ttl:
+                self._data[key] = (created, list(questions))
+
+    def _save(self, items):
+        # Write to a temporary file and rename so a crash never leaves a torn cache
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(items, f)
+        os.replace(tmp, self.path)
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+
+# Process-wide cache; set JOBSAGE_QUESTION_CACHE_PATH to persist it on disk
+question_cache = QuestionCache(
+    maxsize=int(os.environ.get("JOBSAGE_QUESTION_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("JOBSAGE_QUESTION_CACHE_TTL", str(24 * 3600))),
+    path=os.environ.get("JOBSAGE_QUESTION_CACHE_PATH"),
+    flush_seconds=float(os.environ.get("JOBSAGE_QUESTION_CACHE_FLUSH", "5")),
+)
+register_collector("question_cache", lambda: {f"question_cache_{k}": v for k, v in question_cache.stats().items()})
@@ -0,0 +1,122 @@
+# Near-duplicate detection for generated interview questions.
+# Questions are reduced to word shingles and MinHash signatures; an LSH index
+# (banded signatures) finds candidate matches without comparing against every
+# stored question, so checks stay cheap on large question banks. Regeneration of
+# duplicates is capped, after which the least similar candidate is kept.
+#
+#   JOBSAGE_DEDUPE_THRESHOLD=0.6  estimated Jaccard similarity counted as a duplicate
+#   JOBSAGE_DEDUPE_ATTEMPTS=2     regenerations allowed per question
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+from metrics import inc
+
+DEFAULT_THRESHOLD = float(os.environ.get("JOBSAGE_DEDUPE_THRESHOLD", "0.6"))
+MAX_ATTEMPTS = int(os.environ.get("JOBSAGE_DEDUPE_ATTEMPTS", "2"))
+NUM_PERM = 64
+SHINGLE_SIZE = 2
+
+
+@lru_cache(maxsize=None)
+def _hash_params():
+    # numpy and the fixed permutation parameters, set up on first use to keep
+    # numpy off the app's cold-start path
+    import numpy as np
+
+    rng = np.random.RandomState(20240917)
+    a = rng.randint(1, 2**31 - 1, NUM_PERM).astype(np.uint64)
+    b = rng.randint(0, 2**31 - 1, NUM_PERM).astype(np.uint64)
+    return np, a, b, np.uint64((1 << 61) - 1), np.uint64((1 << 32) - 1)
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    # Lowercased word k-grams, ignoring punctuation and question numbering like "Q1:"
+    words = re.findall(r"[a-z0-9+#]+", text.lower())
+    if words and re.fullmatch(r"q?\d+", words[0]):
+        words = words[1:]
+    if len(words) < k:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash(text):
+    # NUM_PERM-wide MinHash signature of the text's shingles
+    np, a, b, prime, max_hash = _hash_params()
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingles(text)),
+        dtype=np.uint64,
+    )
+    return (((hashes[:, None] * a + b) % prime) & max_hash).min(axis=0)
+
+
+def _bands_for(threshold, num_perm=NUM_PERM):
+    # Pick (bands, rows) with bands * rows == num_perm whose LSH threshold
+    # (1 / bands) ** (1 / rows) is closest to, but not above, the requested one
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold] or options[:1]
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1]))
+
+
+class QuestionDeduper:
+    def __init__(self, questions=(), threshold=DEFAULT_THRESHOLD, key=None):
+        # key: optional function picking the part of a question to compare,
+        # e.g. dropping a prompt the model echoes back
+        self.threshold = threshold
+        self.key = key or (lambda text: text)
+        self.bands, self.rows = _bands_for(threshold)
+        self.questions = []
+        self._signatures = []
+        self._buckets = [{} for _ in range(self.bands)]
+        for q in questions:
+            self.add(q)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def _band_keys(self, signature):
+        r = self.rows
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def add(self, question):
+        signature = minhash(self.key(question))
+        index = len(self.questions)
+        self.questions.append(question)
+        self._signatures.append(signature)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, []).append(index)
+
+    def most_similar(self, question):
+        # (estimated Jaccard similarity, stored question) of the closest LSH candidate,
+        # or (0.0, None) when no stored question shares a band
+        signature = minhash(self.key(question))
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        best = (0.0, None)
+        for index in candidates:
+            similarity = float((self._signatures[index] == signature).mean())
+            if similarity > best[0]:
+                best = (similarity, self.questions[index])
+        return best
+
+    def is_duplicate(self, question):
+        return self.most_similar(question)[0] >= self.threshold
+
+    def unique(self, question, regenerate, max_attempts=MAX_ATTEMPTS):
+        # Keep question if it is not a near-duplicate; otherwise call regenerate()
+        # at most max_attempts times. The chosen question is added to the index.
+        best, best_similarity = question, self.most_similar(question)[0]
+        attempts = 0
+        while best_similarity >= self.threshold and attempts < max_attempts:
+            inc("question_duplicates_total", help="near-duplicate questions regenerated")
+            attempts += 1
+            candidate = regenerate()
+            similarity = self.most_similar(candidate)[0]
+            if similarity < best_similarity:
+                best, best_similarity = candidate, similarity
+        if best_similarity >= self.threshold:
+            inc("question_dedupe_exhausted_total", help="questions kept after running out of regeneration attempts")
+        self.add(best)
+        return best
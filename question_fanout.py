@@ -0,0 +1,95 @@
+# Helpers for generating several technical questions without blocking on each one.
+# Requests are fanned out to a shared thread pool so the candidate only waits for
+# the question currently being asked while the rest finish in the background.
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from single_flight import SingleFlight
+
+# Shared by all sessions in the process; size it to the upstream concurrency we can afford
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("JOBSAGE_GENERATION_WORKERS", "16")),
+    thread_name_prefix="question-gen",
+)
+
+# Identical question generations from concurrent candidates share one upstream call.
+# Process-wide like the pool: Streamlit reruns the app script on every interaction,
+# so a table created there would only ever see one session's calls.
+generation_flight = SingleFlight("generation")
+
+
+def submit_questions(generate, keys):
+    # Start one generate() call per key and return their futures in order. A key
+    # already in flight for another session joins that call instead of starting one.
+    return [executor.submit(generation_flight.do, key, generate) for key in keys]
+
+
+def collect_question(future, timeout, retry):
+    # Wait for one question; on timeout or upstream error, cancel it and
+    # call retry() once in the foreground instead
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+    except Exception:
+        pass
+    return retry()
+
+
+def cancel_all(futures):
+    # Best-effort cancel of work that has not started yet
+    for future in futures:
+        future.cancel()
+
+
+# Generic questions used when the model cannot be reached and the question cache
+# has nothing for this role; {skill} and {position} are filled from the answers
+LOCAL_QUESTION_TEMPLATES = [
+    "Describe a project where you used {skill}. What was the hardest problem and how did you solve it?",
+    "How would you explain the core concepts of {skill} to a junior teammate?",
+    "What are common performance pitfalls with {skill}, and how do you avoid them?",
+    "How do you test and debug code or systems built with {skill}?",
+    "Which trade-offs do you consider when choosing {skill} for a {position} task?",
+    "Tell us about a time you had to learn something new quickly as a {position}.",
+    "How do you keep the quality of your work high under a tight deadline as a {position}?",
+]
+
+
+def local_questions(position, skills, n):
+    # n distinct template questions, rotating over the candidate's skills
+    skill_list = [s.strip() for s in skills.split(",") if s.strip()] or [position]
+    return [
+        template.format(skill=skill_list[i % len(skill_list)], position=position)
+        for i, template in enumerate(LOCAL_QUESTION_TEMPLATES[:n])
+    ]
+
+
+def build_batch_prompt(base_prompt, n):
+    # Turn a single-question prompt into a request for n questions as a JSON array
+    return (
+        f"{base_prompt}\n\n"
+        f"Instead of one question, write {n} different questions. "
+        f"Reply with a JSON array of exactly {n} strings and nothing else."
+    )
+
+
+def parse_question_list(text, n):
+    # Extract up to n questions from a model reply that should be a JSON array.
+    # Falls back to one question per line if the reply is not valid JSON.
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if match:
+        try:
+            items = json.loads(match.group(0))
+            questions = [str(q).strip() for q in items if str(q).strip()]
+            if questions:
+                return questions[:n]
+        except ValueError:
+            pass
+    questions = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-*]|\d+[.)])\s*", "", line).strip().strip('",')
+        if line:
+            questions.append(line)
+    return questions[:n]
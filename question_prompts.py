@@ -0,0 +1,33 @@
+# Technical question prompts of the chat apps.
+# Shared by the apps and the offline question bank builder (question_bank.py), so
+# pre-generated questions come from exactly the prompts the apps would send.
+# Skills are canonicalized, so "ReactJS" and "react.js" give the same prompt.
+from skill_taxonomy import canonical_skills
+
+# gpt2 sampling settings for chatbot4_0.py, blocking and streaming paths alike
+GPT2_GENERATION_KWARGS = dict(
+    max_length=120,
+    do_sample=True,
+    top_k=40,
+    top_p=0.9,
+    temperature=0.9,
+    repetition_penalty=2.5
+)
+
+
+def jobsage_question_prompt(position, skills, difficulty):
+    # difficulty: "moderate" or "advanced", see question_cache.difficulty_bucket
+    skills = ", ".join(canonical_skills(skills))
+    return f"Ask one concise {difficulty} technical interview question for a {position} role with these skills: {skills}. Keep it short (max 2 sentences)."
+
+
+def chatbot2_question_prompt(position, skills):
+    return f"Ask one interview question for a {position} role focusing on these skills: {', '.join(canonical_skills(skills))}."
+
+
+def chatbot4_question_prompt(skill, qnum):
+    return (
+        f"Generate a challenging and in-depth technical interview question #{qnum} "
+        f"that evaluates advanced problem-solving ability in the skill: {skill}. "
+        f"The question should be scenario-based or require deep explanation, not a simple definition."
+    )
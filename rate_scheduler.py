@@ -0,0 +1,170 @@
+# Process-wide scheduler for calls to the router API.
+# A token bucket (JOBSAGE_LLM_RATE requests per second, bursts of JOBSAGE_LLM_BURST)
+# keeps us inside the quota, and callers waiting for a token are served by
+# priority: interactive checks (moderation) first, then question generation, then
+# speculative prefetch. The queue is bounded (JOBSAGE_LLM_MAX_QUEUE); when it is
+# full the lowest-priority waiter is shed with QueueFullError. The rate adapts
+# AIMD-style: halved on every 429 (and paused for Retry-After), then raised
+# step by step on successes back up to the configured quota.
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from metrics import inc, observe, register_collector
+
+INTERACTIVE, GENERATION, PREFETCH = range(3)
+PRIORITY_NAMES = ("interactive", "generation", "prefetch")
+
+RATE = float(os.environ.get("JOBSAGE_LLM_RATE", "20"))
+BURST = float(os.environ.get("JOBSAGE_LLM_BURST", "40"))
+MAX_QUEUE = int(os.environ.get("JOBSAGE_LLM_MAX_QUEUE", "200"))
+MIN_RATE_FRACTION = 0.05
+MAX_RETRY_AFTER = 30.0
+# A burst of 429s from requests already in flight counts as one throttling event
+DECREASE_COOLDOWN = 1.0
+
+
+class QueueFullError(Exception):
+    # Raised as LLMError by llm_client; callers fall back as for any unavailable LLM
+    pass
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "state")
+
+    def __init__(self, priority, seq):
+        self.priority = priority
+        self.seq = seq
+        self.state = "waiting"  # waiting, granted, shed, gone
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateScheduler:
+    def __init__(self, rate=RATE, burst=BURST, max_queue=MAX_QUEUE):
+        self.max_rate = rate
+        self.min_rate = rate * MIN_RATE_FRACTION
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.tokens = burst
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._queue = []  # heap of _Waiter; entries that left are dropped lazily
+        self._queued = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        if now > self._updated:
+            start = max(self._updated, self._paused_until)
+            if now > start:
+                self.tokens = min(self.burst, self.tokens + (now - start) * self.rate)
+            self._updated = now
+
+    def _head(self):
+        while self._queue and self._queue[0].state != "waiting":
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
+
+    def _shed_lowest(self, priority):
+        # Make room for a request of this priority by shedding the lowest-priority
+        # (then newest) waiter; False if every waiter outranks it
+        waiting = [w for w in self._queue if w.state == "waiting"]
+        lowest = max(waiting, default=None)
+        if lowest is None or lowest.priority <= priority:
+            return False
+        lowest.state = "shed"
+        self._queued -= 1
+        self._cond.notify_all()
+        return True
+
+    def acquire(self, priority=GENERATION, timeout=None):
+        # Wait for a request slot; raises QueueFullError when shed and TimeoutError
+        # when no slot was granted within timeout seconds
+        start = time.monotonic()
+        end = None if timeout is None else start + timeout
+        name = PRIORITY_NAMES[priority]
+        with self._cond:
+            if self._queued >= self.max_queue and not self._shed_lowest(priority):
+                inc("llm_queue_rejected_total", help="LLM calls shed because the scheduler queue was full", priority=name)
+                raise QueueFullError("LLM request queue is full")
+            waiter = _Waiter(priority, next(self._seq))
+            heapq.heappush(self._queue, waiter)
+            self._queued += 1
+            try:
+                while True:
+                    if waiter.state == "shed":
+                        inc("llm_queue_rejected_total", help="LLM calls shed because the scheduler queue was full", priority=name)
+                        raise QueueFullError("LLM request queue is full")
+                    now = time.monotonic()
+                    self._refill(now)
+                    head = self._head()
+                    if head is waiter and self.tokens >= 1 and now >= self._paused_until:
+                        heapq.heappop(self._queue)
+                        waiter.state = "granted"
+                        self._queued -= 1
+                        self.tokens -= 1
+                        # The next waiter may be able to go too
+                        self._cond.notify_all()
+                        break
+                    if end is not None and now >= end:
+                        raise TimeoutError("LLM request timed out waiting for a rate limit slot")
+                    if head is waiter:
+                        delay = max(self._paused_until - now, (1 - self.tokens) / self.rate, 0.001)
+                    else:
+                        delay = None
+                    if end is not None:
+                        delay = min(delay, end - now) if delay is not None else end - now
+                    self._cond.wait(delay)
+            finally:
+                if waiter.state == "waiting":
+                    waiter.state = "gone"
+                    self._queued -= 1
+                    self._cond.notify_all()
+        observe("llm_queue_wait_seconds", time.monotonic() - start, help="time LLM calls waited for a rate limit slot",
+                priority=name)
+
+    def try_acquire(self, priority=GENERATION):
+        # Take a slot only if one is free right now and nobody is waiting, e.g. for hedged requests
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if self._head() is None and self.tokens >= 1 and now >= self._paused_until:
+                self.tokens -= 1
+                return True
+            return False
+
+    def record_throttled(self, retry_after=None):
+        # Multiplicative decrease on a 429, and no calls at all for Retry-After seconds
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            if now - self._last_decrease >= DECREASE_COOLDOWN:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = min(self.tokens, 0.0)
+                self._last_decrease = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + min(retry_after, MAX_RETRY_AFTER))
+
+    def record_success(self):
+        # Additive increase: back to the full quota after about 20 successful calls per halving
+        with self._cond:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 40)
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"rate": self.rate, "tokens": self.tokens, "queue_depth": self._queued, "throttled": self.throttled}
+
+
+scheduler = RateScheduler()
+register_collector("rate_scheduler", lambda: {f"llm_scheduler_{k}": v for k, v in scheduler.stats().items()})
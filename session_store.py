@@ -0,0 +1,135 @@
+# Process-wide store of in-progress interview sessions with spill to disk.
+# Sessions live in RAM while candidates are active. A background sweeper
+# serializes sessions idle for longer than JOBSAGE_SESSION_IDLE seconds to a local
+# SQLite file and drops them from memory, and the least recently used sessions are
+# spilled as soon as more than JOBSAGE_MAX_RESIDENT_SESSIONS are resident. get()
+# transparently rehydrates a spilled session by its token, so a candidate who
+# reconnects (or comes back later with the same link) resumes where they stopped.
+# Sessions that are busy (background work still running) stay in memory until the
+# work is done, so no result is lost to a spill.
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import register_collector
+
+SESSION_DB_PATH = os.environ.get("JOBSAGE_SESSION_DB", "sessions.db")
+IDLE_SECONDS = float(os.environ.get("JOBSAGE_SESSION_IDLE", "300"))
+MAX_RESIDENT = int(os.environ.get("JOBSAGE_MAX_RESIDENT_SESSIONS", "1000"))
+SPILL_TTL = float(os.environ.get("JOBSAGE_SESSION_TTL", str(7 * 24 * 3600)))
+SWEEP_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class SessionStore:
+    def __init__(self, decode, path=SESSION_DB_PATH, idle_seconds=IDLE_SECONDS, max_resident=MAX_RESIDENT,
+                 ttl=SPILL_TTL, sweep_seconds=SWEEP_SECONDS):
+        # decode(bytes) -> session; sessions must provide to_bytes() and busy
+        self.decode = decode
+        self.idle_seconds = idle_seconds
+        self.max_resident = max_resident
+        self.ttl = ttl
+        self.spilled = 0
+        self.rehydrated = 0
+        self._resident = OrderedDict()  # token -> [session, last access time]
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        if sweep_seconds:
+            threading.Thread(target=self._sweep, args=(sweep_seconds,), name="session-sweeper", daemon=True).start()
+
+    def get(self, token):
+        # The session for token, from memory or rehydrated from disk; None if unknown
+        with self._lock:
+            entry = self._resident.get(token)
+            if entry is not None:
+                entry[1] = time.time()
+                self._resident.move_to_end(token)
+                return entry[0]
+            row = self._conn.execute("SELECT data FROM sessions WHERE token = ?", (token,)).fetchone()
+            if row is None:
+                return None
+            session = self.decode(row[0])
+            self.rehydrated += 1
+            self._resident[token] = [session, time.time()]
+            self._evict_over_capacity()
+            return session
+
+    def put(self, token, session):
+        with self._lock:
+            self._resident[token] = [session, time.time()]
+            self._resident.move_to_end(token)
+            self._evict_over_capacity()
+
+    def spill_idle(self):
+        # Move sessions idle past the threshold to disk; returns how many were spilled
+        cutoff = time.time() - self.idle_seconds
+        with self._lock:
+            idle = [token for token, (session, last) in self._resident.items() if last < cutoff and not session.busy]
+            self._spill(idle)
+            with self._conn:
+                self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+        return len(idle)
+
+    def spill_all(self):
+        with self._lock:
+            self._spill(list(self._resident))
+
+    def stats(self):
+        with self._lock:
+            return {"resident": len(self._resident), "spilled": self.spilled, "rehydrated": self.rehydrated}
+
+    def _evict_over_capacity(self):
+        # Least recently used idle sessions first; called with the lock held
+        excess = len(self._resident) - self.max_resident
+        if excess > 0:
+            self._spill([token for token, (session, _) in self._resident.items() if not session.busy][:excess])
+
+    def _spill(self, tokens):
+        # Serialize and drop from memory in one transaction; called with the lock held,
+        # so a concurrent get() never misses a session that is half-way to disk
+        if not tokens:
+            return
+        now = time.time()
+        rows = [(token, self._resident[token][0].to_bytes(), now) for token in tokens]
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO sessions (token, data, updated_at) VALUES (?, ?, ?)", rows)
+        for token in tokens:
+            del self._resident[token]
+        self.spilled += len(tokens)
+
+    def _sweep(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.spill_idle()
+            except sqlite3.Error:
+                pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store(decode):
+    # Process-wide store, created on first use; resident sessions are spilled at exit
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(decode)
+            atexit.register(_store.spill_all)
+            register_collector("session_store", lambda: {f"session_store_{k}": v for k, v in _store.stats().items()})
+        return _store
@@ -0,0 +1,75 @@
+# Single-flight coalescing of identical in-flight requests.
+# When many candidates reach the same stage with the same inputs at once, the
+# first caller for a key runs the upstream call and everyone who asks for the
+# same key while it is still running waits for that call and gets its result (or
+# its exception). Nothing is cached once the call finishes; that is the question
+# cache's job. Works for threads (do) and asyncio (do_async), also mixed: an
+# async caller can join a call started by a thread and vice versa.
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from metrics import register_collector, safe_name
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future of the running call
+        prefix = f"singleflight_{safe_name(name)}"
+        register_collector(prefix, lambda: {f"{prefix}_{k}": v for k, v in self.stats().items()})
+
+    def _join(self, key):
+        # (future, leader): the leader must run the call and resolve the future
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        # fn() once for all concurrent callers with the same key
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, coro_fn):
+        # await coro_fn() once for all concurrent callers with the same key
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await coro_fn()
+        except BaseException as exc:
+            # Includes cancellation of the leader, so followers are not left waiting
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            ratio = self.coalesced / self.calls if self.calls else 0.0
+            return {"calls": self.calls, "coalesced": self.coalesced, "coalescing_ratio": ratio,
+                    "inflight": len(self._inflight)}
@@ -0,0 +1,251 @@
+# Canonical names for free-text skills.
+# "ReactJS", "react.js" and "React" all become "React", so prompts and question
+# cache keys do not depend on how a candidate spelled a skill. Lookups go through
+# an alias map (exact match on a punctuation-insensitive key), then a trie (a
+# truncated spelling of one skill, e.g. "kubernet"), then a BK-tree (a typo within
+# a small edit distance, e.g. "pyhton"). Skills that match nothing are kept as
+# typed, with whitespace tidied: a wrong rewrite ("NestJS" -> "Next.js") is worse
+# than none, so aliases are other names of the same skill, never a related tool or
+# a broader topic. Results are cached, so repeated skills cost microseconds.
+import re
+from functools import lru_cache
+
+# canonical name -> other spellings (the canonical name itself is always an alias)
+SKILL_ALIASES = {
+    "Python": ["py", "python3"],
+    "Java": ["core java", "java se"],
+    "JavaScript": ["js", "ecmascript", "es6", "vanilla js"],
+    "TypeScript": ["ts"],
+    "C": ["c language", "c programming"],
+    "C++": ["cpp", "cplusplus", "c plus plus"],
+    "C#": ["csharp", "c sharp"],
+    "Go": ["golang"],
+    "Rust": [],
+    "Kotlin": [],
+    "Swift": [],
+    "Scala": [],
+    "Ruby": [],
+    "PHP": [],
+    "R": ["r language", "r programming"],
+    "SQL": ["structured query language"],
+    "PostgreSQL": ["postgres", "pgsql"],
+    "MySQL": [],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "React": ["reactjs", "react.js"],
+    "React Native": ["reactnative"],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue.js": ["vue", "vuejs"],
+    "Node.js": ["node", "nodejs"],
+    "Express.js": ["express", "expressjs"],
+    "Next.js": ["nextjs", "next"],
+    "NestJS": ["nest", "nest.js"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "Tailwind CSS": ["tailwind"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": [],
+    "Spring Boot": ["springboot"],
+    "Ruby on Rails": ["rails", "ror"],
+    ".NET": ["dotnet", "dot net"],
+    "REST APIs": ["rest", "rest api", "restful", "restful apis"],
+    "GraphQL": [],
+    "Git": [],
+    "Linux": [],
+    "Docker": [],
+    "Kubernetes": ["k8s"],
+    "AWS": ["amazon web services"],
+    "Azure": ["microsoft azure"],
+    "GCP": ["google cloud", "google cloud platform"],
+    "Terraform": [],
+    "CI/CD": ["cicd"],
+    "Kafka": ["apache kafka"],
+    "Spark": ["apache spark"],
+    "Hadoop": [],
+    "Airflow": ["apache airflow"],
+    "Machine Learning": ["ml"],
+    "Deep Learning": ["dl"],
+    "NLP": ["natural language processing"],
+    "Computer Vision": [],
+    "Generative AI": ["genai", "gen ai"],
+    "TensorFlow": ["tf"],
+    "PyTorch": ["torch"],
+    "scikit-learn": ["sklearn"],
+    "Pandas": [],
+    "NumPy": [],
+    "Statistics": ["stats"],
+    "Data Analysis": ["data analytics"],
+    "Data Structures and Algorithms": ["dsa"],
+    "System Design": [],
+    "Object-Oriented Programming": ["oop", "oops"],
+    "Excel": ["ms excel", "microsoft excel"],
+    "Power BI": ["powerbi"],
+    "Tableau": [],
+    "Selenium": [],
+    "Jest": [],
+    "Manual Testing": [],
+    "Figma": [],
+    "Agile": [],
+    "Communication": ["communication skills"],
+    "Leadership": [],
+}
+
+# Shorter keys are not matched by prefix or typo: one edit turns "go" into "c",
+# "flash" into "flask" or "jest" into "rest".
+MIN_FUZZY_LENGTH = 6
+MIN_PREFIX_LENGTH = 4
+# A typo match must be this many edits closer than the nearest other skill
+FUZZY_MARGIN = 2
+
+
+def skill_key(skill):
+    # Case, spaces and separators do not distinguish skills; "+" and "#" do (C, C++, C#)
+    return re.sub(r"[\s._\-/]+", "", skill.lower())
+
+
+def edit_distance(a, b, transpositions=False):
+    # Levenshtein distance, or with transpositions the optimal string alignment
+    # distance, where a swap of adjacent letters ("pyhton") is one edit. Only plain
+    # Levenshtein is a metric, so only it can be used to build a BK-tree.
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            d = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if transpositions and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, before[j - 2] + 1)
+            current.append(d)
+        before, previous = previous, current
+    return previous[-1]
+
+
+class BKTree:
+    # Metric tree over keys: only subtrees whose edge distance can still be within
+    # max_distance of the query are visited
+    def __init__(self, distance=edit_distance):
+        self.distance = distance
+        self.root = None  # (key, {edge distance: child})
+
+    def add(self, key):
+        if self.root is None:
+            self.root = (key, {})
+            return
+        node = self.root
+        while True:
+            d = self.distance(key, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (key, {})
+                return
+            node = child
+
+    def search(self, key, max_distance):
+        # [(distance, key)] within max_distance, closest first
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_key, children = stack.pop()
+            d = self.distance(key, node_key)
+            if d <= max_distance:
+                found.append((d, node_key))
+            for edge, child in children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+
+class _TrieNode:
+    __slots__ = ("children", "skills", "shortest")
+
+    def __init__(self):
+        self.children = {}
+        self.skills = set()  # canonical skills with a key under this node
+        self.shortest = None  # length of the shortest key under this node
+
+
+class SkillIndex:
+    def __init__(self, aliases=SKILL_ALIASES):
+        self.aliases = {}  # key -> canonical skill
+        self.trie = _TrieNode()
+        self.bktree = BKTree()
+        for canonical, spellings in aliases.items():
+            for spelling in [canonical] + spellings:
+                self.add_alias(spelling, canonical)
+
+    def add_alias(self, spelling, canonical):
+        key = skill_key(spelling)
+        self.aliases[key] = canonical
+        node = self.trie
+        node.skills.add(canonical)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.skills.add(canonical)
+            node.shortest = min(node.shortest or len(key), len(key))
+        if len(key) >= MIN_FUZZY_LENGTH:
+            self.bktree.add(key)
+
+    def _node(self, key):
+        node = self.trie
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def complete(self, prefix):
+        # Canonical skills with a spelling starting with prefix, sorted
+        node = self._node(skill_key(prefix))
+        return sorted(node.skills) if node is not None else []
+
+    def lookup(self, skill):
+        # Canonical name for skill, or None if it is not in the taxonomy
+        key = skill_key(skill)
+        if key in self.aliases:
+            return self.aliases[key]
+        if len(key) >= MIN_PREFIX_LENGTH:
+            # A truncated spelling of one skill, at least two thirds as long as its
+            # spellings: "kubernet" but not "comp" (Computer Vision) or "spring"
+            node = self._node(key)
+            if node is not None and len(node.skills) == 1 and 3 * len(key) >= 2 * node.shortest:
+                return next(iter(node.skills))
+        if len(key) >= MIN_FUZZY_LENGTH:
+            # One typo in short words, two in long ones. Each transposition is two
+            # Levenshtein edits, so search twice as far and rank by the typo distance.
+            max_typos = 1 if len(key) < 9 else 2
+            best = {}  # canonical skill -> typo distance of its nearest spelling
+            for _, near in self.bktree.search(key, 2 * max_typos + FUZZY_MARGIN):
+                canonical = self.aliases[near]
+                distance = edit_distance(key, near, transpositions=True)
+                best[canonical] = min(best.get(canonical, distance), distance)
+            ranked = sorted((distance, canonical) for canonical, distance in best.items())
+            if ranked and ranked[0][0] <= max_typos and (
+                    len(ranked) == 1 or ranked[1][0] - ranked[0][0] >= FUZZY_MARGIN):
+                return ranked[0][1]
+        return None
+
+
+skill_index = SkillIndex()
+
+
+@lru_cache(maxsize=8192)
+def canonical_skill(skill):
+    tidy = re.sub(r"\s+", " ", skill.strip())
+    return skill_index.lookup(tidy) or tidy
+
+
+def canonical_skills(skills):
+    # Raw comma-separated answer or list of skills -> canonical skills, in the order
+    # given and without duplicates ("React, reactjs" is one skill)
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    result = []
+    for skill in skills:
+        if skill.strip():
+            canonical = canonical_skill(skill)
+            if canonical.lower() not in {s.lower() for s in result}:
+                result.append(canonical)
+    return result
@@ -0,0 +1,99 @@
+# Cold-start benchmark for the chat apps.
+# Each run starts a fresh interpreter that renders the app's first screen with
+# Streamlit's AppTest and reports time-to-first-render, a second (warm) render for
+# comparison, and the import cost of every top-level module the app pulled in
+# (from python -X importtime).
+#
+#   python startup_benchmark.py
+#   python startup_benchmark.py --apps JobSage.py Chatbot2_0.py --runs 5 --top 10
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APPS = ["JobSage.py", "Chatbot1_0.py", "Chatbot2_0.py", "chatbot4_0.py"]
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def child(app):
+    # Runs in the fresh interpreter; prints one JSON line on stdout
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    harness = time.perf_counter() - start
+    before = set(sys.modules)
+    at = AppTest.from_file(os.path.join(HERE, app), default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    new_modules = sorted({name.split(".")[0] for name in set(sys.modules) - before})
+    start = time.perf_counter()
+    at.run()
+    second = time.perf_counter() - start
+    print(json.dumps({
+        "harness_s": harness,
+        "first_render_s": first,
+        "second_render_s": second,
+        "error": at.exception[0].message if at.exception else None,
+        "new_modules": new_modules,
+    }))
+
+
+def import_costs(stderr, modules):
+    # Cumulative import time (seconds) of each top-level module imported by the app
+    costs = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        # One space after the bar marks an import not nested in another import
+        if match and match.group(3) == " " and match.group(4) in modules:
+            costs[match.group(4)] = costs.get(match.group(4), 0) + int(match.group(2)) / 1e6
+    return costs
+
+
+def measure(app, env):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", app],
+        capture_output=True, text=True, cwd=HERE, env=env,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{app}: {proc.stderr.strip().splitlines()[-1]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_s"] = wall
+    result["imports"] = import_costs(proc.stderr, set(result["new_modules"]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of the chat apps")
+    parser.add_argument("--apps", nargs="+", default=APPS)
+    parser.add_argument("--runs", type=int, default=3, help="cold starts per app (medians are reported)")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list per app")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    env = dict(os.environ)
+    env.setdefault("HF_API_KEY", "startup-benchmark")
+    for app in args.apps:
+        runs = [measure(app, env) for _ in range(args.runs)]
+        if runs[-1]["error"]:
+            print(f"{app}: first render raised {runs[-1]['error']}")
+        median = lambda key: statistics.median(r[key] for r in runs) * 1000
+        print(f"\n{app}: first render {median('first_render_s'):.0f} ms, warm render {median('second_render_s'):.0f} ms, "
+              f"process total {median('process_s'):.0f} ms (streamlit test harness {median('harness_s'):.0f} ms)")
+        modules = {name for r in runs for name in r["imports"]}
+        costs = {name: statistics.median(r["imports"].get(name, 0) for r in runs) for name in modules}
+        for name, cost in sorted(costs.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {name:<28}{cost * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
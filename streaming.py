@@ -0,0 +1,100 @@
+# Token streaming helpers for question generation.
+# Both the OpenAI-compatible client and the transformers pipelines are turned
+# into plain generators of text chunks that st.write_stream can render, and
+# time-to-first-token and total latency are recorded separately.
+import threading
+import time
+from collections import deque
+
+from metrics import observe
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LatencyStats:
+    # Keeps the most recent time-to-first-token and total latency samples (seconds)
+    def __init__(self, maxlen=1000):
+        self.ttft = deque(maxlen=maxlen)
+        self.total = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, ttft, total):
+        with self._lock:
+            if ttft is not None:
+                self.ttft.append(ttft)
+            self.total.append(total)
+
+    def summary(self):
+        with self._lock:
+            ttft, total = list(self.ttft), list(self.total)
+        return {
+            "count": len(total),
+            "ttft_p50": _percentile(ttft, 50),
+            "ttft_p95": _percentile(ttft, 95),
+            "total_p50": _percentile(total, 50),
+            "total_p95": _percentile(total, 95),
+        }
+
+
+# Process-wide latency samples for streamed question generation
+question_latency = LatencyStats()
+
+
+def timed_stream(chunks, stats=question_latency):
+    # Pass chunks through unchanged while timing the first one and the whole stream
+    start = time.perf_counter()
+    ttft = None
+    try:
+        for chunk in chunks:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+                observe("stream_first_token_seconds", ttft, help="time to first streamed token")
+            yield chunk
+    finally:
+        total = time.perf_counter() - start
+        stats.record(ttft, total)
+        observe("stream_total_seconds", total, help="total streamed generation time")
+
+
+def openai_text_stream(stream):
+    # Text deltas from a chat.completions.create(..., stream=True) response
+    for chunk in stream:
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+def pipeline_text_stream(generator, prompt, skip_prompt=False, timeout=120, **kwargs):
+    # Run a transformers pipeline in a worker thread and yield decoded text as
+    # tokens are produced. skip_prompt=False keeps the prompt in the output,
+    # matching what the text-generation pipeline returns without streaming.
+    from transformers import TextIteratorStreamer
+
+    streamer = TextIteratorStreamer(
+        generator.tokenizer, skip_prompt=skip_prompt, skip_special_tokens=True, timeout=timeout
+    )
+    errors = []
+
+    def run():
+        try:
+            generator(prompt, streamer=streamer, **kwargs)
+        except Exception as exc:
+            errors.append(exc)
+            # Unblock the consumer, which would otherwise wait for more tokens
+            streamer.end()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for text in streamer:
+        if text:
+            yield text
+    thread.join()
+    if errors:
+        raise errors[0]
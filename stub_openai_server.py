@@ -0,0 +1,126 @@
+# Local stub of the OpenAI-compatible chat-completions API used by JobSage.py.
+# Replies instantly-plausible content after a configurable latency and can inject
+# errors, so load tests run without touching router.huggingface.co.
+#
+#   python stub_openai_server.py --port 8001 --latency-ms 400 --jitter-ms 200 --error-rate 0.02
+#   JOBSAGE_BASE_URL=http://127.0.0.1:8001/v1 HF_API_KEY=stub streamlit run JobSage.py
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+    def __init__(self, latency_ms=300, jitter_ms=100, error_rate=0.0, throttle_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate          # fraction of requests answered with HTTP 500
+        self.throttle_rate = throttle_rate    # fraction of requests answered with HTTP 429
+        self.counter = itertools.count(1)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _reply_for(prompt, n):
+    # Moderation prompts get "no", multi-question prompts a JSON array, the rest one question
+    if "swear words or inappropriate language" in prompt:
+        return "no"
+    if "JSON array" in prompt:
+        return json.dumps([f"Stub question {n}.{i}: explain a trade-off you made?" for i in range(1, 6)])
+    return f"Stub question {n}: how would you design this component for scale?"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        config = self.config
+        with config.lock:
+            config.requests += 1
+        n = next(config.counter)
+
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        roll = random.random()
+        if roll < config.throttle_rate:
+            return self._send_json(429, {"error": {"message": "rate limited (stub)"}}, {"Retry-After": "1"})
+        if roll < config.throttle_rate + config.error_rate:
+            return self._send_json(500, {"error": {"message": "injected failure (stub)"}})
+
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        text = _reply_for(prompt, n)
+        if body.get("stream"):
+            return self._send_stream(text, body.get("model", "stub"))
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{n}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(text.split()),
+                      "total_tokens": len(prompt.split()) + len(text.split())},
+        })
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, text, model):
+        # Server-sent events, one word per chunk
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in text.split(" "):
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(0.01)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_stub_server(port=0, **config):
+    # Start the stub in a daemon thread; returns (server, base_url)
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": StubConfig(**config)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat-completions server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_stub_server(
+        args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+    )
+    print(f"Stub chat-completions API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,48 @@
+# Transcript rendering for JobSage.py.
+# Finished turns are shown as one assistant and one user chat message each. Turns
+# are only ever appended, so each browser session keeps the turns it has already
+# formatted in st.session_state and a rerun formats just the turns answered since
+# the previous one. The cache lives and dies with the browser session; nothing is
+# shared between candidates, since the transcripts hold their personal details.
+import streamlit as st
+
+ASSISTANT_AVATAR = "🧙🏻‍♂️"
+USER_AVATAR = "😊"
+
+
+class _Transcript:
+    __slots__ = ("session_id", "turns")
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.turns = []  # (question markdown, answer markdown) of finished turns
+
+
+def _transcript(name, session_id, count):
+    # The cached transcript, started over for another interview (Exit, a resumed link)
+    key = f"transcript_{name}"
+    transcript = st.session_state.get(key)
+    if transcript is None or transcript.session_id != session_id or len(transcript.turns) > count:
+        transcript = st.session_state[key] = _Transcript(session_id)
+    return transcript
+
+
+def render_transcript(name, session_id, count, turn):
+    # Render the first count turns of the interview's `name` transcript; turn(i) ->
+    # (question, answer) is only called for turns not formatted yet
+    transcript = _transcript(name, session_id, count)
+    for i in range(len(transcript.turns), count):
+        transcript.turns.append(turn(i))
+    for question, answer in transcript.turns:
+        with st.chat_message("assistant", avatar=ASSISTANT_AVATAR):
+            st.markdown(question)
+        with st.chat_message("user", avatar=USER_AVATAR):
+            st.markdown(answer)
+
+
+def render_details(labels, answers):
+    # Personal details block for the confirm/correction stages and the summary
+    for label, answer in zip(labels, answers):
+        if answer is not None:
+            st.markdown(f"**{label}:**")
+            st.markdown(f"{USER_AVATAR} {answer}")
@@ -0,0 +1,85 @@
+# Optional warm-up for fresh processes and replicas.
+# The apps defer heavy imports (openai, numpy, transformers) and model loading
+# until a stage needs them. Warming up does that work ahead of time so the first
+# candidate on a new replica does not pay for it:
+#
+#   JOBSAGE_WARMUP=1  each app starts its warm-up in a background thread on its first run
+#   python warmup.py chatbot2  run the same steps in the foreground, e.g. in an image
+#                              build to download the models and check the configuration
+import argparse
+import os
+import threading
+import time
+
+from metrics import observe
+
+WARMUP_ENABLED = os.environ.get("JOBSAGE_WARMUP") == "1"
+
+
+def _llm_client():
+    # Imports openai/httpx and builds the pooled client (reads the API key)
+    from llm_client import get_client
+
+    get_client()
+
+
+def _question_dedupe():
+    from question_dedupe import minhash
+
+    minhash("warm up")
+
+
+def _pipeline(task, model):
+    def load():
+        from model_registry import get_pipeline
+
+        get_pipeline(task, model)
+    return load
+
+
+STEPS = {
+    "jobsage": [("llm_client", _llm_client), ("question_dedupe", _question_dedupe)],
+    "chatbot2": [("question_dedupe", _question_dedupe),
+                 ("flan_t5_small", _pipeline("text2text-generation", "google/flan-t5-small"))],
+    "chatbot4": [("question_dedupe", _question_dedupe), ("gpt2", _pipeline("text-generation", "gpt2"))],
+}
+
+_started = set()
+_lock = threading.Lock()
+
+
+def run_warmup(app):
+    # Run every step for app, timing each; a failing step does not stop the others
+    timings = {}
+    for name, step in STEPS[app]:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            timings[name] = repr(exc)
+            continue
+        timings[name] = time.perf_counter() - start
+        observe("warmup_seconds", timings[name], help="warm-up step duration", app=app, step=name)
+    return timings
+
+
+def warm_up(app, force=False):
+    # Start app's warm-up once per process in a background thread. A no-op unless
+    # JOBSAGE_WARMUP=1 (or force), so it never delays the first render.
+    if not (WARMUP_ENABLED or force):
+        return None
+    with _lock:
+        if app in _started:
+            return None
+        _started.add(app)
+    thread = threading.Thread(target=run_warmup, args=(app,), name=f"warmup-{app}", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preload imports and models for a JobSage app")
+    parser.add_argument("app", choices=sorted(STEPS))
+    args = parser.parse_args()
+    for name, result in run_warmup(args.app).items():
+        print(f"{name:<20}{result:.2f}s" if isinstance(result, float) else f"{name:<20}failed: {result}")